@@ -0,0 +1,90 @@
+"""Month-by-month amortization schedules.
+
+Every schedule pays the installment from calculate_installment, rounds
+interest, principal and balance to cents each month, and settles whatever
+cents remain in the final payment so the balance ends at exactly zero.
+The scalar generator and the vectorized portfolio functions follow the
+same steps and give the same figures.
+"""
+import numpy as np
+
+from loan_core import calculate_installment
+from loan_math import calculate_installments, round_cents
+
+
+def amortization_schedule(loan_amount, interest_rate, term):
+    """Yield one dict per month with payment, interest, principal and balance."""
+    payment = calculate_installment(loan_amount, interest_rate, term)
+    r = interest_rate / (100 * 12)
+    months = term * 12
+    balance = loan_amount
+    for month in range(1, months + 1):
+        interest = round(balance * r, 2)
+        if month == months:
+            principal = balance
+        else:
+            principal = round(payment - interest, 2)
+        balance = round(balance - principal, 2)
+        yield {
+            'month':     month,
+            'payment':   round(principal + interest, 2),
+            'interest':  interest,
+            'principal': principal,
+            'balance':   balance,
+        }
+
+
+def _amortize(amounts, rates, terms):
+    """Yield (month, interest, principal, balance) arrays across a set of loans.
+
+    Loans that have already matured show zeros.
+    """
+    amounts = np.asarray(amounts, dtype=np.float64)
+    rates = np.asarray(rates, dtype=np.float64)
+    months = np.asarray(terms, dtype=np.int64) * 12
+    payment = calculate_installments(amounts, rates, terms)
+    r = rates / (100 * 12)
+    balance = amounts.copy()
+    for month in range(1, int(months.max(initial=0)) + 1):
+        active = months >= month
+        interest = np.where(active, round_cents(balance * r), 0.0)
+        principal = np.where(months == month, balance,
+                             np.where(active, round_cents(payment - interest), 0.0))
+        balance = round_cents(balance - principal)
+        yield month, interest, principal, balance
+
+
+def portfolio_balances(loan_amounts, interest_rates, terms):
+    """Return a (loans, months) matrix of the balance left after each month."""
+    balances = np.zeros((len(loan_amounts), int(np.max(terms, initial=0)) * 12))
+    for month, _, _, balance in _amortize(loan_amounts, interest_rates, terms):
+        balances[:, month - 1] = balance
+    return balances
+
+
+def portfolio_cash_flows(loan_amounts, interest_rates, terms, chunk_size=100000):
+    """Return total payment, interest, principal and balance per month across a portfolio.
+
+    Loans are amortized chunk_size at a time, so memory stays bounded
+    however large the portfolio is. Index 0 of each array is month 1.
+    """
+    amounts = np.asarray(loan_amounts, dtype=np.float64)
+    rates = np.asarray(interest_rates, dtype=np.float64)
+    terms = np.asarray(terms, dtype=np.int64)
+    months = int(terms.max(initial=0)) * 12
+    flows = {name: np.zeros(months) for name in ('payment', 'interest', 'principal', 'balance')}
+    for start in range(0, len(amounts), chunk_size):
+        chunk = slice(start, start + chunk_size)
+        for month, interest, principal, balance in _amortize(amounts[chunk], rates[chunk], terms[chunk]):
+            flows['interest'][month - 1] += interest.sum()
+            flows['principal'][month - 1] += principal.sum()
+            flows['balance'][month - 1] += balance.sum()
+    flows['payment'] = flows['interest'] + flows['principal']
+    return flows
+
+
+def approved_portfolio(records):
+    """Return (amounts, rates, terms) for the approved loans in a LoanRecords."""
+    rows = records.select(status='approved')
+    columns = records.columns
+    return columns['loan_amount'][rows], columns['interest_rate'][rows], columns['term'][rows]
@@ -0,0 +1,131 @@
+import json
+
+import numpy as np
+
+from loan_core import loan_types
+from loan_math import calculate_installments, round_cents
+from record_writer import FIELD_NAMES, get_record_writer
+
+# Reason codes for each row of a batch; 0 means the loan was approved.
+APPROVED = 0
+INVALID_TYPE = 1
+INVALID_TERM = 2
+LOW_INCOME = 3
+
+
+def _lookup_types(loan_type_names):
+    """Return the distinct names, each row's name index and each name's loan_types index (-1 if invalid)."""
+    names, inverse = np.unique(np.asarray(loan_type_names, dtype=str), return_inverse=True)
+    index_by_type = {lt["loan_type"]: i for i, lt in enumerate(loan_types)}
+    codes = np.array([index_by_type.get((name.lower().split() or [''])[0], -1)
+                      for name in names], dtype=np.int64)
+    return names, inverse.reshape(-1), codes
+
+
+def process_loan_batch(loan_type_names, monthly_incomes, loan_amounts, terms):
+    """Underwrite many applications at once from columnar inputs.
+
+    Gives the same decisions, payments and messages as
+    process_loan_application, one entry per row, but nothing is saved.
+    A monthly income of 0 is denied here instead of raising.
+    """
+    names, name_index, name_codes = _lookup_types(loan_type_names)
+    type_index = name_codes[name_index]
+    incomes = np.asarray(monthly_incomes, dtype=np.float64)
+    amounts = np.asarray(loan_amounts, dtype=np.float64)
+    terms = np.asarray(terms, dtype=np.int64)
+    size = len(type_index)
+
+    rates = np.array([lt["interest_rate"] for lt in loan_types] + [np.nan])
+    max_terms = np.array([lt["max_term"] for lt in loan_types] + [0])
+    rate = rates[type_index]
+    valid_type = type_index >= 0
+    valid_term = valid_type & (terms > 0) & (terms <= max_terms[type_index])
+
+    payment = np.full(size, np.nan)
+    payment[valid_term] = calculate_installments(amounts[valid_term], rate[valid_term], terms[valid_term])
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        affordable = valid_term & ~(payment / incomes > 0.5)
+    total_interest = np.full(size, np.nan)
+    total_interest[affordable] = round_cents(
+        payment[affordable] * terms[affordable] * 12 - amounts[affordable])
+
+    reason = np.select([~valid_type, ~valid_term, ~affordable],
+                       [INVALID_TYPE, INVALID_TERM, LOW_INCOME], APPROVED)
+
+    type_names = np.array([lt["loan_type"] for lt in loan_types], dtype=object)
+    loan_type = np.where(valid_type, type_names[np.maximum(type_index, 0)],
+                         names.astype(object)[name_index])
+    term_messages = np.array(
+        [f"Term must be between 1 and {loan_types[t]['max_term']} years for {name}." if t >= 0 else ''
+         for name, t in zip(names.tolist(), name_codes.tolist())], dtype=object)
+    message = np.select(
+        [reason == INVALID_TYPE, reason == INVALID_TERM, reason == LOW_INCOME],
+        ["Invalid loan type.", term_messages[name_index],
+         "Your income is too low for this loan amount and term."], '').astype(object)
+
+    return {
+        'loan_type':       loan_type,
+        'monthly_income':  incomes,
+        'loan_amount':     amounts,
+        'interest_rate':   rate,
+        'term':            terms,
+        'monthly_payment': payment,
+        'total_interest':  total_interest,
+        'status':          np.where(affordable, 'approved', 'denied'),
+        'reason':          reason,
+        'message':         message,
+    }
+
+
+def batch_rows(results, fields=FIELD_NAMES):
+    """Turn batch results back into loan_data dicts, with None for missing values."""
+    columns = [np.where(np.isnan(results[f]), None, results[f].astype(object))
+               if results[f].dtype.kind == 'f' else results[f]
+               for f in fields]
+    for values in zip(*(c.tolist() for c in columns)):
+        yield dict(zip(fields, values))
+
+
+def save_loan_batch(results, file_path='loan_records.csv'):
+    """Append every row of a batch to the loan records CSV via the shared record writer."""
+    get_record_writer(file_path).write_rows(batch_rows(results))
+
+
+def read_application_chunks(file_path, chunk_size=65536):
+    """Stream a JSON-lines applications file as columnar chunks.
+
+    Each line holds loan_type, monthly_income, loan_amount and term.
+    Only chunk_size rows are held in memory at a time.
+    """
+    with open(file_path) as file:
+        chunk = []
+        for line in file:
+            if line.strip():
+                chunk.append(json.loads(line))
+            if len(chunk) == chunk_size:
+                yield _columns(chunk)
+                chunk = []
+        if chunk:
+            yield _columns(chunk)
+
+
+def _columns(applications):
+    """Split a list of application dicts into the batch input columns."""
+    return {
+        'loan_type':      [a['loan_type'] for a in applications],
+        'monthly_income': [a['monthly_income'] for a in applications],
+        'loan_amount':    [a['loan_amount'] for a in applications],
+        'term':           [a['term'] for a in applications],
+    }
+
+
+def process_application_file(file_path, chunk_size=65536, save=False):
+    """Underwrite an applications file chunk by chunk, yielding each chunk's results."""
+    for chunk in read_application_chunks(file_path, chunk_size):
+        results = process_loan_batch(chunk['loan_type'], chunk['monthly_income'],
+                                     chunk['loan_amount'], chunk['term'])
+        if save:
+            save_loan_batch(results)
+        yield results
@@ -0,0 +1,209 @@
+"""Reproducible benchmarks for the loan decision path.
+
+Every benchmark runs on the same seeded synthetic applications inside a
+temporary directory, so loan_records.csv is never touched. The benchmarks
+that read records get their own fixed file of the decided applications,
+written before any of them run, so each one can also run on its own.
+Results can be saved as JSON and compared against an earlier run to catch
+regressions.
+
+Run with:
+    python benchmarks.py --size 100000 --save baseline.json
+    python benchmarks.py --size 100000 --compare baseline.json
+"""
+import argparse
+import csv
+import json
+import os
+import random
+import shutil
+import tempfile
+import time
+
+import instrumentation
+import loan_core
+from batch import batch_rows, process_application_file, process_loan_batch, save_loan_batch
+from binary_store import BinaryStore, csv_to_store
+from idempotency import ApplicationCache, process_loan_application_once
+from records import LoanRecords
+from record_writer import FIELD_NAMES, close_record_writers, get_record_writer
+
+LOAN_TYPE_NAMES = ['Housing Loan', 'Auto Loan', 'Personal Loan', 'housing', 'auto', 'personal', 'boat']
+
+
+def synthetic_applications(size, seed=0):
+    """Return columns of size random applications, the same for the same seed.
+
+    Mixes valid and invalid loan types, out-of-range terms and incomes on
+    both sides of the debt ratio limit, so every branch gets exercised.
+    """
+    rng = random.Random(seed)
+    return {
+        'loan_type':      [rng.choice(LOAN_TYPE_NAMES) for _ in range(size)],
+        'monthly_income': [round(rng.uniform(200, 12000), 2) for _ in range(size)],
+        'loan_amount':    [round(rng.uniform(500, 300000), 2) for _ in range(size)],
+        'term':           [rng.randint(0, 27) for _ in range(size)],
+    }
+
+
+def write_applications_file(applications, file_path):
+    """Write application columns as a JSON-lines file for the batch file reader."""
+    with open(file_path, 'w') as file:
+        for values in zip(*applications.values()):
+            file.write(json.dumps(dict(zip(applications, values))) + '\n')
+
+
+def write_records_file(apps, file_path):
+    """Write the decisions for apps as a loan records CSV."""
+    with open(file_path, 'w', newline='') as file:
+        writer = csv.DictWriter(file, fieldnames=FIELD_NAMES)
+        writer.writeheader()
+        writer.writerows(batch_rows(process_loan_batch(*apps.values())))
+
+
+# Each benchmark returns how many items it processed.
+
+def bench_scalar_decide(apps):
+    for args in zip(*apps.values()):
+        loan_core.decide_loan_application(*args)
+    return len(apps['term'])
+
+
+def bench_scalar_process(apps):
+    for args in zip(*apps.values()):
+        loan_core.process_loan_application(*args)
+    close_record_writers()
+    return len(apps['term'])
+
+
+def bench_idempotent_repeats(apps):
+    cache = ApplicationCache(max_entries=len(apps['term']))
+    for _ in range(2):
+        for args in zip(*apps.values()):
+            process_loan_application_once(*args, cache=cache)
+    close_record_writers()
+    return 2 * len(apps['term'])
+
+
+def bench_batch_decide(apps):
+    process_loan_batch(*apps.values())
+    return len(apps['term'])
+
+
+def bench_batch_save(apps):
+    save_loan_batch(process_loan_batch(*apps.values()))
+    close_record_writers()
+    return len(apps['term'])
+
+
+def bench_batch_file(apps):
+    return sum(len(results['status']) for results in process_application_file('applications.jsonl'))
+
+
+def bench_record_writer(apps):
+    row = {'loan_type': 'auto', 'loan_amount': 1000.0, 'interest_rate': 7.5, 'term': 3,
+           'monthly_payment': 31.11, 'total_interest': 119.96, 'status': 'approved',
+           'monthly_income': 2500.0}
+    writer = get_record_writer('writer_bench.csv')
+    for _ in apps['term']:
+        writer.write(row)
+    close_record_writers()
+    return len(apps['term'])
+
+
+def bench_records_load(apps):
+    return len(LoanRecords('records_input.csv'))
+
+
+def bench_binary_store(apps):
+    shutil.rmtree('store_bench', ignore_errors=True)
+    store = BinaryStore('store_bench')
+    count = csv_to_store('records_input.csv', store)
+    store.close()
+    for segment in store.segments():
+        segment['loan_amount'][segment['status'] == 0].sum()
+    return count
+
+
+BENCHMARKS = {
+    'scalar_decide':       bench_scalar_decide,
+    'scalar_process':      bench_scalar_process,
+    'idempotent_repeats':  bench_idempotent_repeats,
+    'batch_decide':        bench_batch_decide,
+    'batch_save':          bench_batch_save,
+    'batch_file':          bench_batch_file,
+    'record_writer':       bench_record_writer,
+    'records_load':        bench_records_load,
+    'binary_store':        bench_binary_store,
+}
+
+
+def run_benchmarks(size=100000, seed=0, repeat=3, names=None):
+    """Run the benchmarks and return {name: {'seconds': best, 'per_sec': items per second}}."""
+    apps = synthetic_applications(size, seed)
+    results = {}
+    previous = os.getcwd()
+    with tempfile.TemporaryDirectory() as work_dir:
+        os.chdir(work_dir)
+        try:
+            write_applications_file(apps, 'applications.jsonl')
+            write_records_file(apps, 'records_input.csv')
+            for name, benchmark in BENCHMARKS.items():
+                if names and name not in names:
+                    continue
+                best = float('inf')
+                for _ in range(repeat):
+                    start = time.perf_counter()
+                    items = benchmark(apps)
+                    best = min(best, time.perf_counter() - start)
+                results[name] = {'seconds': round(best, 6), 'per_sec': round(items / best, 1)}
+        finally:
+            close_record_writers()
+            os.chdir(previous)
+    return results
+
+
+def compare(results, baseline, tolerance=0.10):
+    """Return the benchmarks that got more than tolerance slower than baseline."""
+    regressions = {}
+    for name, result in results.items():
+        before = baseline.get(name)
+        if before and result['seconds'] > before['seconds'] * (1 + tolerance):
+            regressions[name] = round(result['seconds'] / before['seconds'] - 1, 3)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the loan decision path.")
+    parser.add_argument('--size', type=int, default=100000)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--only', nargs='*', choices=list(BENCHMARKS))
+    parser.add_argument('--save', help="write results to this JSON file")
+    parser.add_argument('--compare', help="flag regressions against this JSON file")
+    parser.add_argument('--tolerance', type=float, default=0.10)
+    parser.add_argument('--stages', action='store_true',
+                        help="also print per-stage timing histograms (adds overhead)")
+    args = parser.parse_args()
+
+    if args.stages:
+        instrumentation.instrument()
+    results = run_benchmarks(args.size, args.seed, args.repeat, args.only)
+    for name, result in results.items():
+        print(f"{name:>20}: {result['seconds']:.4f}s  {result['per_sec']:>12,.0f}/s")
+    if args.stages:
+        print(instrumentation.export_json(indent=2))
+    if args.save:
+        with open(args.save, 'w') as file:
+            json.dump(results, file, indent=2)
+    if args.compare:
+        with open(args.compare) as file:
+            regressions = compare(results, json.load(file), args.tolerance)
+        for name, slowdown in regressions.items():
+            print(f"REGRESSION {name}: {slowdown:.1%} slower")
+        if regressions:
+            raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,294 @@
+"""Compact binary loan record store.
+
+Records are fixed-width and written to append-only segment files in a
+store directory. A new segment starts once the current one reaches
+max_segment_bytes. Each segment is a 16-byte header followed by packed
+records, so it can be memory-mapped and scanned as a NumPy structured
+array without parsing anything.
+
+Loan type names are kept in types.json in the store directory and
+records refer to them by code, so invalid names round-trip too.
+
+To mirror live decisions into a store, attach it to the record writer:
+
+    get_record_writer().add_listener(lambda rows, _: store.write_rows(rows))
+
+Run `python binary_store.py loan_records.csv` to compare how fast every
+column can be read into arrays, and the size, against the CSV.
+"""
+import csv
+import glob
+import json
+import os
+import shutil
+import sys
+import threading
+import time
+
+import numpy as np
+
+from records import is_header, repair_row
+from record_writer import FIELD_NAMES
+
+MAGIC = b'LOANREC1'
+HEADER_SIZE = 16
+
+RECORD_DTYPE = np.dtype([
+    ('loan_type',       '<u2'),
+    ('status',          'u1'),
+    ('term',            '<i4'),
+    ('loan_amount',     '<f8'),
+    ('interest_rate',   '<f8'),
+    ('monthly_payment', '<f8'),
+    ('total_interest',  '<f8'),
+    ('monthly_income',  '<f8'),
+])
+
+STATUSES = ['approved', 'denied']
+
+
+def _check_header(path, header):
+    if header[:8] != MAGIC:
+        raise ValueError(f"{path} is not a loan record segment.")
+    record_size = int(np.frombuffer(header[8:12], dtype='<u4')[0])
+    if record_size != RECORD_DTYPE.itemsize:
+        raise ValueError(f"{path} holds {record_size}-byte records, expected {RECORD_DTYPE.itemsize}.")
+
+
+def _missing(value):
+    return np.nan if value is None or value == '' else float(value)
+
+
+class BinaryStore:
+    """Append-only, memory-mappable segments of fixed-width loan records."""
+
+    def __init__(self, store_dir='loan_store', max_segment_bytes=64 * 1024 * 1024):
+        self.store_dir = store_dir
+        self.max_segment_bytes = max_segment_bytes
+        os.makedirs(store_dir, exist_ok=True)
+        self._types_path = os.path.join(store_dir, 'types.json')
+        try:
+            with open(self._types_path) as file:
+                self.loan_types = json.load(file)
+        except FileNotFoundError:
+            self.loan_types = []
+        self._type_codes = {name: code for code, name in enumerate(self.loan_types)}
+        self._lock = threading.Lock()
+        self._file = None
+
+    def segment_paths(self):
+        """Segment files in the order they were written."""
+        return sorted(glob.glob(os.path.join(self.store_dir, 'segment-*.bin')))
+
+    def _type_code(self, name):
+        # Called with self._lock held.
+        code = self._type_codes.get(name)
+        if code is None:
+            code = self._type_codes[name] = len(self.loan_types)
+            self.loan_types.append(name)
+            temp_path = self._types_path + '.tmp'
+            with open(temp_path, 'w') as file:
+                json.dump(self.loan_types, file)
+            os.replace(temp_path, self._types_path)
+        return code
+
+    def _open_segment(self):
+        paths = self.segment_paths()
+        if paths and os.path.getsize(paths[-1]) < self.max_segment_bytes:
+            path = paths[-1]
+        else:
+            number = int(os.path.basename(paths[-1])[8:-4]) + 1 if paths else 1
+            path = os.path.join(self.store_dir, f'segment-{number:06d}.bin')
+        file = open(path, 'ab')
+        if file.tell() == 0:
+            file.write(MAGIC + np.array([RECORD_DTYPE.itemsize, 0], dtype='<u4').tobytes())
+        else:
+            with open(path, 'rb') as existing:
+                try:
+                    _check_header(path, existing.read(HEADER_SIZE))
+                except ValueError:
+                    file.close()
+                    raise
+            # Drop a torn record left by a crash so later records stay aligned.
+            torn = (file.tell() - HEADER_SIZE) % RECORD_DTYPE.itemsize
+            if torn:
+                file.truncate(file.tell() - torn)
+        return file
+
+    def append(self, records):
+        """Append a structured array of RECORD_DTYPE records, rotating segments as needed."""
+        with self._lock:
+            start = 0
+            while start < len(records):
+                if self._file is None:
+                    self._file = self._open_segment()
+                room = max(1, (self.max_segment_bytes - self._file.tell()) // RECORD_DTYPE.itemsize)
+                self._file.write(records[start:start + room].tobytes())
+                start += room
+                if self._file.tell() >= self.max_segment_bytes:
+                    self._file.close()
+                    self._file = None
+            if self._file is not None:
+                self._file.flush()
+
+    def write_rows(self, rows):
+        """Append loan_data dicts or 8-field tuples as written by save_loan."""
+        if not rows:
+            return
+        if isinstance(rows[0], dict):
+            rows = [[row.get(f) for f in FIELD_NAMES] for row in rows]
+        loan_type, amount, rate, term, payment, interest, status, income = zip(*rows)
+        records = np.empty(len(rows), dtype=RECORD_DTYPE)
+        with self._lock:
+            records['loan_type'] = [self._type_code(name) for name in loan_type]
+        records['status'] = [STATUSES.index(s) for s in status]
+        records['term'] = [int(t) for t in term]
+        records['loan_amount'] = [float(a) for a in amount]
+        records['interest_rate'] = [_missing(r) for r in rate]
+        records['monthly_payment'] = [_missing(p) for p in payment]
+        records['total_interest'] = [_missing(i) for i in interest]
+        records['monthly_income'] = [_missing(i) for i in income]
+        self.append(records)
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    def segments(self):
+        """Yield each segment as a read-only memory-mapped structured array.
+
+        Raises ValueError for a file whose header is not a segment header
+        for RECORD_DTYPE.
+        """
+        for path in self.segment_paths():
+            with open(path, 'rb') as file:
+                _check_header(path, file.read(HEADER_SIZE))
+            count = (os.path.getsize(path) - HEADER_SIZE) // RECORD_DTYPE.itemsize
+            if count > 0:
+                yield np.memmap(path, dtype=RECORD_DTYPE, mode='r', offset=HEADER_SIZE, shape=(count,))
+
+    def read_all(self):
+        """Every record in one array (this copies; use segments() to scan in place)."""
+        parts = list(self.segments())
+        return np.concatenate(parts) if parts else np.empty(0, dtype=RECORD_DTYPE)
+
+    def rows(self):
+        """Yield records as loan_data dicts, with None for missing values."""
+        for segment in self.segments():
+            columns = [segment[f].tolist() for f in RECORD_DTYPE.names]
+            for loan_type, status, term, amount, rate, payment, interest, income in zip(*columns):
+                yield {
+                    'loan_type':       self.loan_types[loan_type],
+                    'loan_amount':     amount,
+                    'interest_rate':   None if rate != rate else rate,
+                    'term':            term,
+                    'monthly_payment': None if payment != payment else payment,
+                    'total_interest':  None if interest != interest else interest,
+                    'status':          STATUSES[status],
+                    'monthly_income':  None if income != income else income,
+                }
+
+
+def csv_to_store(csv_path, store, chunk_size=65536):
+    """Append every readable row of a loan records CSV to a store; returns the row count.
+
+    Legacy rows are repaired and unreadable rows skipped, as in LoanRecords.
+    """
+    count = 0
+    with open(csv_path, newline='') as file:
+        chunk = []
+        for row in csv.reader(file):
+            if not row or is_header(row):
+                continue
+            try:
+                chunk.append(repair_row(row)[0])
+            except ValueError:
+                continue
+            if len(chunk) == chunk_size:
+                store.write_rows(chunk)
+                count += len(chunk)
+                chunk = []
+        if chunk:
+            store.write_rows(chunk)
+            count += len(chunk)
+    return count
+
+
+def store_to_csv(store, csv_path):
+    """Write every record in a store out as a loan records CSV; returns the row count."""
+    count = 0
+    with open(csv_path, 'w', newline='') as file:
+        writer = csv.DictWriter(file, fieldnames=FIELD_NAMES)
+        writer.writeheader()
+        for row in store.rows():
+            writer.writerow(row)
+            count += 1
+    return count
+
+
+def _csv_columns(csv_path):
+    """Parse every readable row of a loan records CSV into one array per RECORD_DTYPE field."""
+    type_codes, rows = {}, []
+    with open(csv_path, newline='') as file:
+        for row in csv.reader(file):
+            if not row or is_header(row):
+                continue
+            try:
+                record = repair_row(row)[0]
+            except ValueError:
+                continue
+            rows.append((type_codes.setdefault(record[0], len(type_codes)),
+                         STATUSES.index(record[6])) + record[1:6] + record[7:])
+    loan_type, status, amount, rate, term, payment, interest, income = zip(*rows) if rows else [()] * 8
+    return {
+        'loan_type':       np.array(loan_type, dtype='<u2'),
+        'status':          np.array(status, dtype='u1'),
+        'term':            np.array(term, dtype='<i4'),
+        'loan_amount':     np.array(amount, dtype='<f8'),
+        'interest_rate':   np.array(rate, dtype='<f8'),
+        'monthly_payment': np.array(payment, dtype='<f8'),
+        'total_interest':  np.array(interest, dtype='<f8'),
+        'monthly_income':  np.array(income, dtype='<f8'),
+    }
+
+
+def benchmark(csv_path, store_dir='loan_store_bench'):
+    """Compare reading every column of csv_path into arrays with reading them from a binary store.
+
+    The store is rebuilt from csv_path on every run, so it always holds the
+    same records as the CSV.
+    """
+    shutil.rmtree(store_dir, ignore_errors=True)
+    store = BinaryStore(store_dir)
+    csv_to_store(csv_path, store)
+    store.close()
+
+    start = time.perf_counter()
+    csv_columns = _csv_columns(csv_path)
+    csv_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    records = BinaryStore(store_dir).read_all()
+    binary_columns = {name: np.ascontiguousarray(records[name]) for name in RECORD_DTYPE.names}
+    binary_seconds = time.perf_counter() - start
+
+    binary_bytes = sum(os.path.getsize(p) for p in store.segment_paths())
+    approved = binary_columns['status'] == 0
+    return {
+        'records':        len(binary_columns['status']),
+        'csv_rows':       len(csv_columns['status']),
+        'csv_bytes':      os.path.getsize(csv_path),
+        'binary_bytes':   binary_bytes,
+        'size_ratio':     round(binary_bytes / os.path.getsize(csv_path), 3),
+        'csv_parse_s':    round(csv_seconds, 4),
+        'binary_read_s':  round(binary_seconds, 4),
+        'speedup':        round(csv_seconds / binary_seconds, 1) if binary_seconds else None,
+        'approved_total': round(float(binary_columns['loan_amount'][approved].sum()), 2),
+    }
+
+
+if __name__ == "__main__":
+    for key, value in benchmark(*sys.argv[1:3]).items():
+        print(f"{key:>15}: {value}")
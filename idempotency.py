@@ -0,0 +1,141 @@
+"""Idempotent loan applications.
+
+Resubmitting an application, whether by a user clicking twice or an
+upstream caller retrying, returns the decision already made instead of
+deciding again and appending another row to loan_records.csv.
+Applications are matched by a client-supplied key when one is given and by
+a normalized fingerprint of the application otherwise. The fingerprint is
+kept with every cached decision, so a client key reused for a different
+application is refused rather than answered with someone else's decision.
+"""
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+
+from loan_core import process_loan_application
+
+
+def application_fingerprint(loan_type_name, monthly_income, loan_amount, term):
+    """Key that is equal for applications that only differ in case, spacing or number types."""
+    return (' '.join(loan_type_name.split()).lower(), float(monthly_income), float(loan_amount), int(term))
+
+
+class ApplicationCache:
+    """Thread-safe LRU cache of decisions with an optional time to live.
+
+    While a decision is being made, identical submissions wait for it
+    rather than deciding again, so a retry storm still costs one decision.
+    """
+
+    def __init__(self, max_entries=10000, ttl=300.0):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self._entries = OrderedDict()   # key -> (expires_at, Future)
+        self._lock = threading.Lock()
+
+    def get_or_compute(self, key, compute):
+        """Return (value, hit), calling compute() only if key has no live entry.
+
+        If compute raises, the error goes to everyone waiting and nothing is cached.
+        """
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and self.ttl is not None and entry[0] <= now and entry[1].done():
+                del self._entries[key]
+                self.expirations += 1
+                entry = None
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                future, owner = entry[1], False
+            else:
+                self.misses += 1
+                future, owner = Future(), True
+                self._entries[key] = (float('inf'), future)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+                    self.evictions += 1
+
+        if not owner:
+            return future.result(), True
+        try:
+            value = compute()
+        except BaseException as error:
+            with self._lock:
+                if self._entries.get(key, (None, None))[1] is future:
+                    del self._entries[key]
+            future.set_exception(error)
+            raise
+        with self._lock:
+            if self._entries.get(key, (None, None))[1] is future:
+                expires_at = now + self.ttl if self.ttl is not None else float('inf')
+                self._entries[key] = (expires_at, future)
+        future.set_result(value)
+        return value, False
+
+    def discard(self, key):
+        """Drop the cached decision for key, if there is one."""
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        """Drop every cached decision."""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        """Return the cache counters and current size."""
+        with self._lock:
+            return {
+                'entries':     len(self._entries),
+                'hits':        self.hits,
+                'misses':      self.misses,
+                'evictions':   self.evictions,
+                'expirations': self.expirations,
+            }
+
+
+application_cache = ApplicationCache()
+
+
+class IdempotencyKeyReused(ValueError):
+    """An idempotency key was sent again with a different application."""
+
+
+def cache_key(loan_type_name, monthly_income, loan_amount, term, idempotency_key=None):
+    """The cache key for an application, preferring the client's own key."""
+    if idempotency_key is not None:
+        return ('key', idempotency_key)
+    return ('application',) + application_fingerprint(loan_type_name, monthly_income, loan_amount, term)
+
+
+def decide_once(cache, application, idempotency_key, compute):
+    """Return (compute(), hit) for an application, deciding each one only once.
+
+    Raises IdempotencyKeyReused if idempotency_key was first used for a
+    different application.
+    """
+    fingerprint = application_fingerprint(*application)
+    (first, value), hit = cache.get_or_compute(
+        cache_key(*application, idempotency_key), lambda: (fingerprint, compute()))
+    if first != fingerprint:
+        raise IdempotencyKeyReused(f"Idempotency key {idempotency_key!r} was used for a different application.")
+    return value, hit
+
+
+def process_loan_application_once(loan_type_name, monthly_income, loan_amount, term,
+                                  idempotency_key=None, cache=application_cache):
+    """process_loan_application, but repeated submissions reuse the first decision.
+
+    Only the first submission is saved to loan_records.csv.
+    """
+    application = (loan_type_name, monthly_income, loan_amount, term)
+    (success, result), _ = decide_once(
+        cache, application, idempotency_key, lambda: process_loan_application(*application))
+    return success, result
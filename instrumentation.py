@@ -0,0 +1,133 @@
+"""Optional per-stage timings for the loan decision path.
+
+instrument() swaps timing wrappers in for the stages that
+process_loan_application calls through loan_core: the loan type lookup,
+the installment maths, the debt ratio check, the whole decision, the
+save, and the record writer's flushes to disk. uninstrument() puts the
+originals back, so there is no cost at all while it is off.
+
+Timings go into fixed-bucket histograms that can be exported as JSON or
+in the Prometheus text format.
+"""
+import json
+import threading
+from bisect import bisect_left
+from functools import wraps
+from time import perf_counter
+
+import loan_core
+from record_writer import RecordWriter
+
+# Upper bounds in seconds: 1us doubling up to about 1s.
+BUCKETS = tuple(1e-6 * 2 ** i for i in range(21))
+
+STAGES = {
+    'lookup':      (loan_core, 'find_loan_type'),
+    'installment': (loan_core, 'calculate_installment'),
+    'debt_ratio':  (loan_core, 'debt_ratio'),
+    'decide':      (loan_core, 'decide_loan_application'),
+    'save':        (loan_core, 'save_loan'),
+    'flush':       (RecordWriter, '_flush_locked'),
+}
+
+
+class Histogram:
+    """Count of observations per latency bucket, plus their sum."""
+
+    def __init__(self, buckets=BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, seconds):
+        index = bisect_left(self.buckets, seconds)
+        with self._lock:
+            self.counts[index] += 1
+            self.count += 1
+            self.sum += seconds
+
+    def quantile(self, q):
+        """Upper bound of the bucket holding the q-th quantile, or None if empty."""
+        if not self.count:
+            return None
+        rank, seen = q * self.count, 0
+        for bound, count in zip(self.buckets + (float('inf'),), self.counts):
+            seen += count
+            if seen >= rank:
+                return bound
+        return float('inf')
+
+    def to_dict(self):
+        return {
+            'count':   self.count,
+            'sum':     self.sum,
+            'mean':    self.sum / self.count if self.count else None,
+            'p50':     self.quantile(0.5),
+            'p99':     self.quantile(0.99),
+            'buckets': dict(zip([str(b) for b in self.buckets] + ['+Inf'], self.counts)),
+        }
+
+
+histograms = {}
+_originals = {}
+
+
+def _timed(stage, function):
+    histogram = histograms.setdefault(stage, Histogram())
+
+    @wraps(function)
+    def wrapper(*args, **kwargs):
+        start = perf_counter()
+        try:
+            return function(*args, **kwargs)
+        finally:
+            histogram.observe(perf_counter() - start)
+    return wrapper
+
+
+def instrument(stages=tuple(STAGES)):
+    """Start recording timings for the given stages (all of them by default)."""
+    for stage in stages:
+        if stage in _originals:
+            continue
+        owner, name = STAGES[stage]
+        _originals[stage] = getattr(owner, name)
+        setattr(owner, name, _timed(stage, _originals[stage]))
+
+
+def uninstrument():
+    """Stop recording and restore the original functions; histograms are kept."""
+    for stage, function in _originals.items():
+        owner, name = STAGES[stage]
+        setattr(owner, name, function)
+    _originals.clear()
+
+
+def reset():
+    """Clear every histogram."""
+    histograms.clear()
+    for stage in _originals:
+        owner, name = STAGES[stage]
+        setattr(owner, name, _timed(stage, _originals[stage]))
+
+
+def export_json(indent=None):
+    """All histograms as a JSON document keyed by stage."""
+    return json.dumps({stage: h.to_dict() for stage, h in histograms.items()}, indent=indent)
+
+
+def export_prometheus(metric='loan_stage_seconds'):
+    """All histograms in the Prometheus text exposition format."""
+    lines = [f"# HELP {metric} Time spent in each loan decision stage.",
+             f"# TYPE {metric} histogram"]
+    for stage, histogram in histograms.items():
+        cumulative = 0
+        for bound, count in zip(histogram.buckets + (float('inf'),), histogram.counts):
+            cumulative += count
+            le = '+Inf' if bound == float('inf') else repr(bound)
+            lines.append(f'{metric}_bucket{{stage="{stage}",le="{le}"}} {cumulative}')
+        lines.append(f'{metric}_sum{{stage="{stage}"}} {histogram.sum}')
+        lines.append(f'{metric}_count{{stage="{stage}"}} {histogram.count}')
+    return '\n'.join(lines) + '\n'
@@ -0,0 +1,103 @@
+"""Load test for the loan decision service.
+
+Opens a number of keep-alive connections, sends random applications
+(single or batched) as fast as the service answers, and reports requests
+per second with p50/p99 latency.
+
+Run with: python loadtest.py --requests 20000 --concurrency 50 --batch 1
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+
+LOAN_TYPES = ['housing', 'auto', 'personal']
+
+
+def random_application(rng):
+    """Return one random application for the service."""
+    return {
+        'loan_type':      rng.choice(LOAN_TYPES),
+        'monthly_income': round(rng.uniform(500, 10000), 2),
+        'loan_amount':    round(rng.uniform(1000, 300000), 2),
+        'term':           rng.randint(1, 25),
+    }
+
+
+def percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, round(fraction * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+async def run_client(host, port, count, batch, rng, latencies):
+    """Send count requests down one connection, recording each latency."""
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        for _ in range(count):
+            applications = [random_application(rng) for _ in range(batch)]
+            body = json.dumps(applications if batch > 1 else applications[0]).encode()
+            request = (f"POST /applications HTTP/1.1\r\nHost: {host}\r\n"
+                       f"Content-Type: application/json\r\nContent-Length: {len(body)}\r\n\r\n").encode() + body
+
+            start = time.perf_counter()
+            writer.write(request)
+            await writer.drain()
+            status_line = await reader.readline()
+            length = 0
+            while True:
+                line = await reader.readline()
+                if line in (b'\r\n', b''):
+                    break
+                if line.lower().startswith(b'content-length:'):
+                    length = int(line.split(b':')[1])
+            await reader.readexactly(length)
+            latencies.append(time.perf_counter() - start)
+            if b' 200 ' not in status_line:
+                raise RuntimeError(f"Unexpected response: {status_line.decode().strip()}")
+    finally:
+        writer.close()
+
+
+async def run_load_test(host='127.0.0.1', port=8080, requests=10000, concurrency=50, batch=1, seed=0):
+    """Run the load test and return a summary dict."""
+    rng = random.Random(seed)
+    latencies = []
+    per_client = [requests // concurrency + (i < requests % concurrency) for i in range(concurrency)]
+    start = time.perf_counter()
+    await asyncio.gather(*(run_client(host, port, n, batch, rng, latencies)
+                           for n in per_client if n))
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    return {
+        'requests':         len(latencies),
+        'applications':     len(latencies) * batch,
+        'seconds':          round(elapsed, 3),
+        'requests_per_sec': round(len(latencies) / elapsed, 1),
+        'decisions_per_sec': round(len(latencies) * batch / elapsed, 1),
+        'p50_ms':           round(percentile(latencies, 0.50) * 1000, 3),
+        'p99_ms':           round(percentile(latencies, 0.99) * 1000, 3),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the loan decision service.")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--requests', type=int, default=10000)
+    parser.add_argument('--concurrency', type=int, default=50)
+    parser.add_argument('--batch', type=int, default=1, help="applications per request")
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+    summary = asyncio.run(run_load_test(args.host, args.port, args.requests,
+                                        args.concurrency, args.batch, args.seed))
+    for key, value in summary.items():
+        print(f"{key:>18}: {value}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""Loan decision core shared by the Tk app, the batch engine and the HTTP service.
+
+Kept free of tkinter and other heavy imports so it loads quickly anywhere.
+"""
+from record_writer import get_record_writer
+
+loan_types = [
+    {"select": 0, "loan_type": "housing",  "interest_rate": 5.2, "max_term": 25},
+    {"select": 1, "loan_type": "auto",     "interest_rate": 7.5, "max_term": 6},
+    {"select": 2, "loan_type": "personal", "interest_rate": 9.6, "max_term": 10}
+]
+
+def calculate_installment(loan_amount, interest_rate, term):
+    """Calculate monthly installment using the standard loan formula."""
+    p = loan_amount
+    r = interest_rate / (100 * 12)
+    n = term * 12
+    m = round((p * r * ((1 + r) ** n)) / (((1 + r) ** n) - 1), 2)
+    return m
+
+def debt_ratio(income, installment):
+    """Ratio of monthly installment to monthly income."""
+    return installment / income
+
+def save_loan(loan_data, monthly_income=None):
+    """Save loan details to the CSV file through the shared record writer.
+
+    monthly_income is recorded alongside so debt ratios can be recomputed
+    later, for example by portfolio statistics and stress tests.
+    """
+    if monthly_income is not None:
+        loan_data = dict(loan_data, monthly_income=monthly_income)
+    get_record_writer('loan_records.csv').write(loan_data)
+
+def find_loan_type(loan_type_name):
+    """Return the loan_types entry for a name like "Housing Loan", or None (also for a blank name)."""
+    words = loan_type_name.lower().split()
+    for lt in loan_types:
+        if words and lt["loan_type"] == words[0]:
+            return lt
+    return None
+
+def decide_loan_application(loan_type_name, monthly_income, loan_amount, term):
+    """Validate loan inputs and calculate payment without saving anything.
+
+    Returns (success, result, loan_data) where loan_data is the row that
+    save_loan would record for this decision.
+    """
+    # Find the matching loan type data.
+    loan_type = find_loan_type(loan_type_name)
+
+    # If loan type is invalid, build the denied record and return.
+    if not loan_type:
+        loan_data = {
+            'loan_type':       loan_type_name,
+            'loan_amount':     loan_amount,
+            'interest_rate':   None,
+            'term':            term,
+            'monthly_payment': None,
+            'total_interest':  None,
+            'status':          'denied'
+        }
+        return False, "Invalid loan type.", loan_data
+    
+    # Check term validity.
+    if term <= 0 or term > loan_type["max_term"]:
+        loan_data = {
+            'loan_type':       loan_type["loan_type"],
+            'loan_amount':     loan_amount,
+            'interest_rate':   loan_type["interest_rate"],
+            'term':            term,
+            'monthly_payment': None,
+            'total_interest':  None,
+            'status':          'denied'
+        }
+        return False, f"Term must be between 1 and {loan_type['max_term']} years for {loan_type_name}.", loan_data
+    
+    # Calculate monthly installment.
+    interest_rate = loan_type["interest_rate"]
+    installment = calculate_installment(loan_amount, interest_rate, term)
+    
+    # Check debt ratio.
+    if debt_ratio(monthly_income, installment) > 0.5:
+        loan_data = {
+            'loan_type':       loan_type["loan_type"],
+            'loan_amount':     loan_amount,
+            'interest_rate':   interest_rate,
+            'term':            term,
+            'monthly_payment': installment,
+            'total_interest':  None,
+            'status':          'denied'
+        }
+        return False, "Your income is too low for this loan amount and term.", loan_data
+    
+    # Loan approved; calculate total interest.
+    total_interest = round(installment * term * 12 - loan_amount, 2)
+    loan_data = {
+        'loan_type':       loan_type["loan_type"],
+        'loan_amount':     loan_amount,
+        'interest_rate':   interest_rate,
+        'term':            term,
+        'monthly_payment': installment,
+        'total_interest':  total_interest,
+        'status':          'approved'
+    }
+    return True, loan_data, loan_data
+
+def process_loan_application(loan_type_name, monthly_income, loan_amount, term):
+    """Validate loan inputs, calculate payment, and save data regardless of approval."""
+    success, result, loan_data = decide_loan_application(loan_type_name, monthly_income, loan_amount, term)
+    save_loan(loan_data, monthly_income)
+    return success, result
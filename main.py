@@ -1,129 +1,107 @@
+import logging
+import queue
+import threading
 import tkinter as tk
-from tkinter import messagebox
-import os
-from csv import DictWriter
-
-loan_types = [
-    {"select": 0, "loan_type": "housing",  "interest_rate": 5.2, "max_term": 25},
-    {"select": 1, "loan_type": "auto",     "interest_rate": 7.5, "max_term": 6},
-    {"select": 2, "loan_type": "personal", "interest_rate": 9.6, "max_term": 10}
-]
-
-def calculate_installment(loan_amount, interest_rate, term):
-    """Calculate monthly installment using the standard loan formula."""
-    p = loan_amount
-    r = interest_rate / (100 * 12)
-    n = term * 12
-    m = round((p * r * ((1 + r) ** n)) / (((1 + r) ** n) - 1), 2)
-    return m
-
-def debt_ratio(income, installment):
-    """Ratio of monthly installment to monthly income."""
-    return installment / income
-
-def save_loan(loan_data):
-    """Save loan details to a CSV file."""
-    file_path = 'loan_records.csv'
-    field_names = loan_data.keys()
-    with open(file_path, 'a+', newline='') as file:
-        writer = DictWriter(file, fieldnames=field_names)
-        if file.tell() == 0:  
-            writer.writeheader()
-        writer.writerow(loan_data)
-
-def process_loan_application(loan_type_name, monthly_income, loan_amount, term):
-    """Validate loan inputs, calculate payment, and save data regardless of approval."""
-    # Find the matching loan type data.
-    loan_type = None
-    for lt in loan_types:
-        if lt["loan_type"] == loan_type_name.lower().split()[0]:
-            loan_type = lt
+from tkinter import filedialog, messagebox, ttk
+
+from batch import process_loan_batch, read_application_chunks, save_loan_batch
+from idempotency import process_loan_application_once
+from loan_core import find_loan_type
+
+logger = logging.getLogger(__name__)
+
+BG = "#e6f0ff"
+BUTTON = {"bg": "#4d94ff", "fg": "white"}
+TITLE_FONT = ("Arial", 14, "bold")
+BULK_CHUNK_SIZE = 5000
+
+# Each screen is a frame built once at startup; navigating only swaps frames.
+screens = {}
+ui = {}
+
+# Background work
+# Decisions and file writes run off the Tk thread. Workers put
+# (callback, value) pairs on `results`, and poll_results runs the callbacks
+# on the Tk thread through root.after.
+
+jobs = queue.Queue()
+results = queue.Queue()
+bulk_cancel = threading.Event()
+
+def decision_worker():
+    """Run queued decision jobs one at a time, forever."""
+    while True:
+        job, callback = jobs.get()
+        try:
+            value = job()
+        except Exception as error:
+            value = error
+        results.put((callback, value))
+
+def run_in_background(job, callback):
+    """Run job() on the decision worker and pass its result (or error) to callback on the Tk thread."""
+    jobs.put((job, callback))
+
+def poll_results():
+    """Deliver finished background results to their callbacks.
+
+    A callback that fails is logged and skipped, so later results still arrive.
+    """
+    while True:
+        try:
+            callback, value = results.get_nowait()
+        except queue.Empty:
             break
+        try:
+            callback(value)
+        except Exception:
+            logger.exception("Background result callback %r failed", callback)
+    root.after(50, poll_results)
+
+def forget_pending_decision():
+    """Drop the single decision in flight, if any, so its result is never shown.
 
-    # If loan type is invalid, record the attempt and return.
-    if not loan_type:
-        loan_data = {
-            'loan_type':       loan_type_name,
-            'loan_amount':     loan_amount,
-            'interest_rate':   None,
-            'term':            term,
-            'monthly_payment': None,
-            'total_interest':  None,
-            'status':          'denied'
-        }
-        save_loan(loan_data)
-        return False, "Invalid loan type."
-    
-    # Check term validity.
-    if term <= 0 or term > loan_type["max_term"]:
-        loan_data = {
-            'loan_type':       loan_type["loan_type"],
-            'loan_amount':     loan_amount,
-            'interest_rate':   loan_type["interest_rate"],
-            'term':            term,
-            'monthly_payment': None,
-            'total_interest':  None,
-            'status':          'denied'
-        }
-        save_loan(loan_data)
-        return False, f"Term must be between 1 and {loan_type['max_term']} years for {loan_type_name}."
-    
-    # Calculate monthly installment.
-    interest_rate = loan_type["interest_rate"]
-    installment = calculate_installment(loan_amount, interest_rate, term)
-    
-    # Check debt ratio.
-    if debt_ratio(monthly_income, installment) > 0.5:
-        loan_data = {
-            'loan_type':       loan_type["loan_type"],
-            'loan_amount':     loan_amount,
-            'interest_rate':   interest_rate,
-            'term':            term,
-            'monthly_payment': installment,
-            'total_interest':  None,
-            'status':          'denied'
-        }
-        save_loan(loan_data)
-        return False, "Your income is too low for this loan amount and term."
-    
-    # Loan approved; calculate total interest.
-    total_interest = round(installment * term * 12 - loan_amount, 2)
-    loan_data = {
-        'loan_type':       loan_type["loan_type"],
-        'loan_amount':     loan_amount,
-        'interest_rate':   interest_rate,
-        'term':            term,
-        'monthly_payment': installment,
-        'total_interest':  total_interest,
-        'status':          'approved'
-    }
-    save_loan(loan_data)
-    return True, loan_data
+    The application is still decided and saved; only the stale result is ignored.
+    """
+    ui["pending_decision"] = None
+    ui["submit_button"].config(state=tk.NORMAL)
+    ui["details_status"].config(text="")
+
+def show_screen(name):
+    """Show one screen and hide the rest."""
+    for screen_name, frame in screens.items():
+        if screen_name == name:
+            frame.pack(fill=tk.BOTH, expand=True)
+        else:
+            frame.pack_forget()
 
 # Tkinter UI Functions
 
 def show_results(success, result):
-    """Clear the window and display loan results or error messages."""
-    for widget in root.winfo_children():
-        widget.destroy()
-    
+    """Fill in the results screen with loan results or error messages and show it."""
+    lines = ui["result_lines"]
     if success:
-        tk.Label(root, text="Loan Approved!", bg="#e6f0ff", font=("Arial", 14, "bold")).pack(pady=10)
-        tk.Label(root, text=f"Loan Type: {result['loan_type'].capitalize()}", bg="#e6f0ff").pack()
-        tk.Label(root, text=f"Loan Amount: ${result['loan_amount']:.2f}", bg="#e6f0ff").pack()
-        tk.Label(root, text=f"Interest Rate: {result['interest_rate']}%", bg="#e6f0ff").pack()
-        tk.Label(root, text=f"Term: {result['term']} years", bg="#e6f0ff").pack()
-        tk.Label(root, text=f"Monthly Payment: ${result['monthly_payment']:.2f}", bg="#e6f0ff").pack()
-        tk.Label(root, text=f"Total Interest: ${result['total_interest']:.2f}", bg="#e6f0ff").pack()
-        tk.Label(root, text=f"Status: {result['status'].capitalize()}", bg="#e6f0ff").pack(pady=10)
+        ui["result_title"].config(text="Loan Approved!")
+        texts = [
+            f"Loan Type: {result['loan_type'].capitalize()}",
+            f"Loan Amount: ${result['loan_amount']:.2f}",
+            f"Interest Rate: {result['interest_rate']}%",
+            f"Term: {result['term']} years",
+            f"Monthly Payment: ${result['monthly_payment']:.2f}",
+            f"Total Interest: ${result['total_interest']:.2f}",
+            f"Status: {result['status'].capitalize()}",
+        ]
+        for label, text in zip(lines, texts):
+            label.config(text=text, fg="black")
     else:
-        tk.Label(root, text="Loan Application Failed", bg="#e6f0ff", font=("Arial", 14, "bold")).pack(pady=10)
-        tk.Label(root, text=result, fg="red", bg="#e6f0ff").pack()
-    
-    tk.Button(root, text="Start Over", command=show_loan_options, bg="#4d94ff", fg="white").pack(pady=10)
+        ui["result_title"].config(text="Loan Application Failed")
+        lines[0].config(text=result, fg="red")
+        for label in lines[1:]:
+            label.config(text="")
+    show_screen("results")
 
 def submit_loan_application(loan_type, mi_entry, amount_entry, term_entry):
-    """Collect user inputs, process the loan, and display results."""
+    """Collect user inputs, process the loan in the background, and display results."""
     try:
         monthly_income = float(mi_entry.get())
         loan_amount = float(amount_entry.get())
@@ -131,52 +109,42 @@ def submit_loan_application(loan_type, mi_entry, amount_entry, term_entry):
     except ValueError:
         messagebox.showerror("Input Error", "Please enter valid numbers for all fields.")
         return
-    
-    success, result = process_loan_application(loan_type, monthly_income, loan_amount, term)
-    show_results(success, result)
+
+    token = object()
+
+    def finished(value):
+        if ui["pending_decision"] is not token:
+            return
+        forget_pending_decision()
+        if isinstance(value, Exception):
+            show_results(False, f"Could not process the application: {value}")
+        else:
+            show_results(*value)
+
+    ui["pending_decision"] = token
+    ui["submit_button"].config(state=tk.DISABLED)
+    ui["details_status"].config(text="Processing...")
+    run_in_background(
+        lambda: process_loan_application_once(loan_type, monthly_income, loan_amount, term), finished)
 
 def show_loan_details(loan_type):
     """Display fields to input income, amount, and term for the selected loan type."""
-    for widget in root.winfo_children():
-        widget.destroy()
-    
-    tk.Label(root, text=f"{loan_type} Selected", bg="#e6f0ff", font=("Arial", 14, "bold")).pack(pady=10)
-    tk.Label(root, text="Monthly Income ($):", bg="#e6f0ff").pack()
-    mi_entry = tk.Entry(root)
-    mi_entry.pack()
-    tk.Label(root, text="Loan Amount ($):", bg="#e6f0ff").pack()
-    amount_entry = tk.Entry(root)
-    amount_entry.pack()
-    
-    max_term = 0
-    for lt in loan_types:
-        if lt["loan_type"] == loan_type.lower().split()[0]:
-            max_term = lt["max_term"]
-            break
-    tk.Label(root, text=f"Term (years, max {max_term}):", bg="#e6f0ff").pack()
-    term_entry = tk.Entry(root)
-    term_entry.pack()
-    
-    tk.Button(root, text="Submit", bg="#4d94ff", fg="white",
-              command=lambda: submit_loan_application(loan_type, mi_entry, amount_entry, term_entry)).pack(pady=5)
-    tk.Button(root, text="Back to Loan Options", bg="#4d94ff", fg="white", command=show_loan_options).pack(pady=5)
+    forget_pending_decision()
+    lt = find_loan_type(loan_type)
+    max_term = lt["max_term"] if lt else 0
+    ui["details_title"].config(text=f"{loan_type} Selected")
+    ui["term_label"].config(text=f"Term (years, max {max_term}):")
+    for entry in (ui["mi_entry"], ui["amount_entry"], ui["term_entry"]):
+        entry.delete(0, tk.END)
+    ui["submit_button"].config(
+        command=lambda: submit_loan_application(loan_type, ui["mi_entry"], ui["amount_entry"], ui["term_entry"]))
+    show_screen("details")
+    ui["mi_entry"].focus_set()
 
 def show_loan_options():
     """Display available loan types and a brief description."""
-    for widget in root.winfo_children():
-        widget.destroy()
-    
-    tk.Label(root, text="Choose the type of loan", bg="#e6f0ff", font=("Arial", 14, "bold")).pack(pady=10)
-    tk.Label(root, text="Housing Loan: 5.2% interest rate, up to 25 years", bg="#e6f0ff").pack()
-    tk.Label(root, text="Auto Loan: 7.5% interest rate, up to 6 years", bg="#e6f0ff").pack()
-    tk.Label(root, text="Personal Loan: 9.6% interest rate, up to 10 years", bg="#e6f0ff").pack(pady=10)
-    
-    tk.Button(root, text="Housing Loan", bg="#4d94ff", fg="white",  
-              command=lambda: show_loan_details("Housing Loan")).pack(pady=5)
-    tk.Button(root, text="Auto Loan", bg="#4d94ff", fg="white",     
-              command=lambda: show_loan_details("Auto Loan")).pack(pady=5)
-    tk.Button(root, text="Personal Loan", bg="#4d94ff", fg="white", 
-              command=lambda: show_loan_details("Personal Loan")).pack(pady=5)
+    forget_pending_decision()
+    show_screen("options")
 
 def on_start_button_click():
     """Check if privacy is agreed; if yes, show loan options."""
@@ -185,16 +153,158 @@ def on_start_button_click():
     else:
         messagebox.showwarning("Privacy Policy", "Please agree to the Privacy Policy before proceeding.")
 
-root = tk.Tk()
-root.title("CS120 Loan Calculator")
-root.configure(bg="#e6f0ff")
-
-tk.Label(root, text="Welcome to CS120 Loans", bg="#e6f0ff", font=("Arial", 14, "bold")).pack(pady=10)
-start_button = tk.Button(root, text="Start Loan Process", command=on_start_button_click, 
-                         bg="#4d94ff", fg="white", relief=tk.RAISED)
-start_button.pack(pady=5)
-privacy_var = tk.IntVar(value=0)
-privacy_check = tk.Checkbutton(root, text="Agree to Privacy Policy", variable=privacy_var, 
-                               bg="#e6f0ff", selectcolor="#4d94ff")
-privacy_check.pack(pady=5)
-root.mainloop()
+# Bulk import
+
+def show_bulk_import():
+    """Display the bulk import screen."""
+    show_screen("bulk")
+
+def choose_bulk_file():
+    """Ask for a JSON-lines applications file to import."""
+    path = filedialog.askopenfilename(
+        title="Choose applications file",
+        filetypes=[("JSON lines", "*.jsonl"), ("All files", "*.*")])
+    if path:
+        ui["bulk_path"].set(path)
+
+def bulk_import_worker(path):
+    """Decide and save every application in path, reporting progress after each chunk."""
+    try:
+        with open(path, 'rb') as file:
+            total = sum(block.count(b'\n') for block in iter(lambda: file.read(1 << 20), b''))
+        results.put((update_bulk_progress, (0, total, 0, 0)))
+        done = approved = denied = 0
+        for chunk in read_application_chunks(path, BULK_CHUNK_SIZE):
+            if bulk_cancel.is_set():
+                results.put((finish_bulk_import, "Import cancelled."))
+                return
+            decisions = process_loan_batch(chunk['loan_type'], chunk['monthly_income'],
+                                           chunk['loan_amount'], chunk['term'])
+            save_loan_batch(decisions)
+            chunk_approved = int((decisions['status'] == 'approved').sum())
+            done += len(decisions['status'])
+            approved += chunk_approved
+            denied += len(decisions['status']) - chunk_approved
+            results.put((update_bulk_progress, (done, max(total, done), approved, denied)))
+        results.put((finish_bulk_import, "Import finished."))
+    except Exception as error:
+        results.put((finish_bulk_import, f"Import failed: {error}"))
+
+def start_bulk_import():
+    """Start importing the chosen file on a background thread."""
+    path = ui["bulk_path"].get()
+    if not path:
+        messagebox.showerror("Bulk Import", "Please choose an applications file first.")
+        return
+    bulk_cancel.clear()
+    ui["bulk_start"].config(state=tk.DISABLED)
+    ui["bulk_cancel"].config(state=tk.NORMAL)
+    ui["bulk_status"].config(text="Importing...", fg="black")
+    threading.Thread(target=bulk_import_worker, args=(path,), daemon=True).start()
+
+def cancel_bulk_import():
+    """Ask the running import to stop after its current chunk."""
+    bulk_cancel.set()
+    ui["bulk_cancel"].config(state=tk.DISABLED)
+
+def update_bulk_progress(progress):
+    """Show how far the import has got and the running approve/deny counts."""
+    done, total, approved, denied = progress
+    ui["bulk_progress"].config(maximum=max(total, 1), value=done)
+    ui["bulk_counts"].config(text=f"Processed {done:,} of {total:,}    Approved: {approved:,}    Denied: {denied:,}")
+
+def finish_bulk_import(message):
+    """Re-enable the import controls once the import stops."""
+    ui["bulk_start"].config(state=tk.NORMAL)
+    ui["bulk_cancel"].config(state=tk.DISABLED)
+    ui["bulk_status"].config(text=message, fg="red" if message.startswith("Import failed") else "black")
+
+# Screen construction
+
+def build_welcome_screen():
+    global privacy_var
+    frame = screens["welcome"] = tk.Frame(root, bg=BG)
+    tk.Label(frame, text="Welcome to CS120 Loans", bg=BG, font=TITLE_FONT).pack(pady=10)
+    tk.Button(frame, text="Start Loan Process", command=on_start_button_click,
+              relief=tk.RAISED, **BUTTON).pack(pady=5)
+    privacy_var = tk.IntVar(value=0)
+    tk.Checkbutton(frame, text="Agree to Privacy Policy", variable=privacy_var,
+                   bg=BG, selectcolor="#4d94ff").pack(pady=5)
+
+def build_options_screen():
+    frame = screens["options"] = tk.Frame(root, bg=BG)
+    tk.Label(frame, text="Choose the type of loan", bg=BG, font=TITLE_FONT).pack(pady=10)
+    tk.Label(frame, text="Housing Loan: 5.2% interest rate, up to 25 years", bg=BG).pack()
+    tk.Label(frame, text="Auto Loan: 7.5% interest rate, up to 6 years", bg=BG).pack()
+    tk.Label(frame, text="Personal Loan: 9.6% interest rate, up to 10 years", bg=BG).pack(pady=10)
+    for loan_type in ("Housing Loan", "Auto Loan", "Personal Loan"):
+        tk.Button(frame, text=loan_type, command=lambda lt=loan_type: show_loan_details(lt),
+                  **BUTTON).pack(pady=5)
+    tk.Button(frame, text="Bulk Import", command=show_bulk_import, **BUTTON).pack(pady=(15, 5))
+
+def build_details_screen():
+    frame = screens["details"] = tk.Frame(root, bg=BG)
+    ui["details_title"] = tk.Label(frame, bg=BG, font=TITLE_FONT)
+    ui["details_title"].pack(pady=10)
+    tk.Label(frame, text="Monthly Income ($):", bg=BG).pack()
+    ui["mi_entry"] = tk.Entry(frame)
+    ui["mi_entry"].pack()
+    tk.Label(frame, text="Loan Amount ($):", bg=BG).pack()
+    ui["amount_entry"] = tk.Entry(frame)
+    ui["amount_entry"].pack()
+    ui["term_label"] = tk.Label(frame, bg=BG)
+    ui["term_label"].pack()
+    ui["term_entry"] = tk.Entry(frame)
+    ui["term_entry"].pack()
+    ui["submit_button"] = tk.Button(frame, text="Submit", **BUTTON)
+    ui["submit_button"].pack(pady=5)
+    ui["details_status"] = tk.Label(frame, bg=BG)
+    ui["details_status"].pack()
+    ui["pending_decision"] = None
+    tk.Button(frame, text="Back to Loan Options", command=show_loan_options, **BUTTON).pack(pady=5)
+
+def build_results_screen():
+    frame = screens["results"] = tk.Frame(root, bg=BG)
+    ui["result_title"] = tk.Label(frame, bg=BG, font=TITLE_FONT)
+    ui["result_title"].pack(pady=10)
+    ui["result_lines"] = [tk.Label(frame, bg=BG) for _ in range(7)]
+    for label in ui["result_lines"]:
+        label.pack()
+    tk.Button(frame, text="Start Over", command=show_loan_options, **BUTTON).pack(pady=10)
+
+def build_bulk_screen():
+    frame = screens["bulk"] = tk.Frame(root, bg=BG)
+    tk.Label(frame, text="Bulk Import", bg=BG, font=TITLE_FONT).pack(pady=10)
+    tk.Label(frame, text="One JSON application per line with loan_type, monthly_income,\n"
+                         "loan_amount and term.", bg=BG).pack()
+    ui["bulk_path"] = tk.StringVar()
+    tk.Label(frame, textvariable=ui["bulk_path"], bg=BG, wraplength=380).pack(pady=5)
+    tk.Button(frame, text="Choose File", command=choose_bulk_file, **BUTTON).pack(pady=5)
+    ui["bulk_progress"] = ttk.Progressbar(frame, length=360, mode="determinate")
+    ui["bulk_progress"].pack(pady=5)
+    ui["bulk_counts"] = tk.Label(frame, bg=BG)
+    ui["bulk_counts"].pack()
+    ui["bulk_status"] = tk.Label(frame, bg=BG)
+    ui["bulk_status"].pack()
+    ui["bulk_start"] = tk.Button(frame, text="Start Import", command=start_bulk_import, **BUTTON)
+    ui["bulk_start"].pack(pady=5)
+    ui["bulk_cancel"] = tk.Button(frame, text="Cancel", command=cancel_bulk_import,
+                                  state=tk.DISABLED, **BUTTON)
+    ui["bulk_cancel"].pack(pady=5)
+    tk.Button(frame, text="Back to Loan Options", command=show_loan_options, **BUTTON).pack(pady=5)
+
+if __name__ == "__main__":
+    root = tk.Tk()
+    root.title("CS120 Loan Calculator")
+    root.configure(bg=BG)
+
+    build_welcome_screen()
+    build_options_screen()
+    build_details_screen()
+    build_results_screen()
+    build_bulk_screen()
+    show_screen("welcome")
+
+    threading.Thread(target=decision_worker, daemon=True).start()
+    root.after(50, poll_results)
+    root.mainloop()
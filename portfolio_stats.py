@@ -0,0 +1,218 @@
+"""Running portfolio statistics with snapshot and replay.
+
+PortfolioStats listens to a record writer and folds in each batch of rows
+as it reaches loan_records.csv. Counts, sums, min/max and quantile
+sketches of monthly payment and debt ratio are then O(1) to read.
+
+A checkpoint writes the statistics to a small JSON snapshot together with
+the file offset they cover. On startup the snapshot is loaded and only the
+rows written after that offset are replayed. Debt ratios are only
+collected for rows that record the applicant's monthly income.
+"""
+import csv
+import json
+import math
+import os
+import threading
+
+from records import is_header, repair_row
+from record_writer import get_record_writer
+
+
+class QuantileSketch:
+    """Streaming quantiles with a bounded relative error.
+
+    Positive values are counted in logarithmic buckets, so the sketch
+    stays small and any quantile is within `accuracy` of the true value.
+    """
+
+    def __init__(self, accuracy=0.01):
+        self.accuracy = accuracy
+        self._gamma = (1 + accuracy) / (1 - accuracy)
+        self._log_gamma = math.log(self._gamma)
+        self.count = 0
+        self.zeros = 0
+        self.buckets = {}
+
+    def add(self, value):
+        self.count += 1
+        if value <= 0:
+            self.zeros += 1
+            return
+        bucket = math.ceil(math.log(value) / self._log_gamma)
+        self.buckets[bucket] = self.buckets.get(bucket, 0) + 1
+
+    def quantile(self, q):
+        """The q-th quantile (0 to 1) of the values added, or None if empty."""
+        if not self.count:
+            return None
+        rank = q * (self.count - 1)
+        seen = self.zeros
+        if rank < seen:
+            return 0.0
+        for bucket in sorted(self.buckets):
+            seen += self.buckets[bucket]
+            if rank < seen:
+                return 2 * self._gamma ** bucket / (self._gamma + 1)
+        return 2 * self._gamma ** max(self.buckets) / (self._gamma + 1)
+
+    def to_dict(self):
+        return {'accuracy': self.accuracy, 'count': self.count, 'zeros': self.zeros,
+                'buckets': {str(k): v for k, v in self.buckets.items()}}
+
+    @classmethod
+    def from_dict(cls, data):
+        sketch = cls(data['accuracy'])
+        sketch.count = data['count']
+        sketch.zeros = data['zeros']
+        sketch.buckets = {int(k): v for k, v in data['buckets'].items()}
+        return sketch
+
+
+class PortfolioStats:
+    """Aggregates over every decision recorded in loan_records.csv."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        self.offset = 0
+        self.total = 0
+        self.by_status = {}
+        self.by_type = {}            # loan type -> {status: count}
+        self.approved_principal = 0.0
+        self.approved_interest = 0.0
+        self.approved_by_type = {}   # loan type -> {'principal': ..., 'interest': ...}
+        self.min_amount = None
+        self.max_amount = None
+        self.min_payment = None
+        self.max_payment = None
+        self.payments = QuantileSketch()
+        self.debt_ratios = QuantileSketch()
+
+    def _add(self, loan_type, amount, payment, interest, status, monthly_income=None):
+        self.total += 1
+        self.by_status[status] = self.by_status.get(status, 0) + 1
+        counts = self.by_type.setdefault(loan_type, {})
+        counts[status] = counts.get(status, 0) + 1
+        if payment is not None:
+            self.payments.add(payment)
+            if monthly_income:
+                self.debt_ratios.add(payment / monthly_income)
+        if status != 'approved':
+            return
+        self.approved_principal += amount
+        self.approved_interest += interest or 0.0
+        totals = self.approved_by_type.setdefault(loan_type, {'principal': 0.0, 'interest': 0.0})
+        totals['principal'] += amount
+        totals['interest'] += interest or 0.0
+        self.min_amount = amount if self.min_amount is None else min(self.min_amount, amount)
+        self.max_amount = amount if self.max_amount is None else max(self.max_amount, amount)
+        if payment is not None:
+            self.min_payment = payment if self.min_payment is None else min(self.min_payment, payment)
+            self.max_payment = payment if self.max_payment is None else max(self.max_payment, payment)
+
+    def update(self, rows, offset):
+        """Record listener: fold in rows just written, ending at offset."""
+        with self._lock:
+            for row in rows:
+                self._add(row['loan_type'], float(row['loan_amount']), row['monthly_payment'],
+                          row['total_interest'], row['status'], row.get('monthly_income'))
+            self.offset = offset
+
+    def replay(self, file_path='loan_records.csv'):
+        """Fold in the rows written to file_path after self.offset; returns how many."""
+        with open(file_path, 'rb') as file:
+            if os.fstat(file.fileno()).st_size < self.offset:
+                raise ValueError(f"{file_path} is shorter than the snapshot offset.")
+            file.seek(self.offset)
+            data = file.read()
+        end = data.rfind(b'\n') + 1
+        added = 0
+        with self._lock:
+            for row in csv.reader(data[:end].decode().splitlines()):
+                if not row or is_header(row):
+                    continue
+                try:
+                    record, _ = repair_row(row)
+                except ValueError:
+                    continue
+                loan_type, amount, _, _, payment, interest, status, income = record
+                self._add(loan_type, amount, None if payment != payment else payment,
+                          None if interest != interest else interest, status,
+                          None if income != income else income)
+                added += 1
+            self.offset += end
+        return added
+
+    def summary(self):
+        """Return the current statistics as a plain dict."""
+        with self._lock:
+            return {
+                'total':              self.total,
+                'by_status':          dict(self.by_status),
+                'by_type':            {t: dict(c) for t, c in self.by_type.items()},
+                'approval_rate':      self.by_status.get('approved', 0) / self.total if self.total else None,
+                'approved_principal': round(self.approved_principal, 2),
+                'approved_interest':  round(self.approved_interest, 2),
+                'approved_by_type':   {t: {k: round(v, 2) for k, v in totals.items()}
+                                       for t, totals in self.approved_by_type.items()},
+                'amount_range':       [self.min_amount, self.max_amount],
+                'payment_range':      [self.min_payment, self.max_payment],
+                'payment_quantiles':  {q: self.payments.quantile(q) for q in (0.5, 0.9, 0.99)},
+                'debt_ratio_quantiles': {q: self.debt_ratios.quantile(q) for q in (0.5, 0.9, 0.99)},
+            }
+
+    def checkpoint(self, snapshot_path='portfolio_stats.json'):
+        """Atomically write the statistics and the offset they cover to snapshot_path."""
+        with self._lock:
+            state = {name: value for name, value in vars(self).items()
+                     if not name.startswith('_') and not isinstance(value, QuantileSketch)}
+            state['payments'] = self.payments.to_dict()
+            state['debt_ratios'] = self.debt_ratios.to_dict()
+        temp_path = snapshot_path + '.tmp'
+        with open(temp_path, 'w') as file:
+            json.dump(state, file, separators=(',', ':'))
+        os.replace(temp_path, snapshot_path)
+
+    @classmethod
+    def from_snapshot(cls, snapshot_path='portfolio_stats.json'):
+        """Load statistics from a snapshot written by checkpoint()."""
+        stats = cls()
+        stats._load_snapshot(snapshot_path)
+        return stats
+
+    def _load_snapshot(self, snapshot_path):
+        with open(snapshot_path) as file:
+            state = json.load(file)
+        self._reset()
+        self.payments = QuantileSketch.from_dict(state.pop('payments'))
+        self.debt_ratios = QuantileSketch.from_dict(state.pop('debt_ratios'))
+        for name, value in state.items():
+            setattr(self, name, value)
+
+    def _restore(self, records_path, snapshot_path):
+        # The snapshot plus the tail after it, or the whole file without a usable snapshot.
+        try:
+            self._load_snapshot(snapshot_path)
+            self.replay(records_path)
+        except (OSError, ValueError, KeyError):
+            self._reset()
+            self.replay(records_path)
+
+
+def load_portfolio_stats(records_path='loan_records.csv', snapshot_path='portfolio_stats.json'):
+    """Start statistics from the snapshot plus the log tail after it, and keep them live.
+
+    Falls back to replaying the whole file when there is no usable
+    snapshot. The returned stats are attached to the shared record writer
+    for records_path, so later decisions are counted as they are written;
+    remove stats.update from the writer when they are no longer needed.
+    Catching up happens under the writer's lock, so no flush can slip in
+    between the replay and the listener.
+    """
+    stats = PortfolioStats()
+    get_record_writer(records_path).add_listener(
+        stats.update, catch_up=lambda: stats._restore(records_path, snapshot_path))
+    return stats
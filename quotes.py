@@ -0,0 +1,116 @@
+"""Affordability quotes from precomputed annuity factors.
+
+The annuity factor r(1+r)^n/((1+r)^n-1) only depends on the loan type's
+rate and the term, so it is worked out once for every valid (loan type,
+term) pair in loan_types. The table is rebuilt automatically whenever a
+rate or maximum term in loan_types changes. Payments are still rounded to
+cents in the same order as calculate_installment, so every quote agrees
+with what process_loan_application would decide.
+"""
+from bisect import bisect_left
+from math import floor, isfinite
+
+import numpy as np
+
+from loan_core import find_loan_type, loan_types
+from loan_math import round_cents
+
+MAX_DEBT_RATIO = 0.5
+
+_cache = {'key': None, 'factors': None}
+
+
+def annuity_factors():
+    """Return {loan type: [(r, growth, factor) for terms 1..max_term]}."""
+    key = tuple((lt["loan_type"], lt["interest_rate"], lt["max_term"]) for lt in loan_types)
+    if _cache['key'] != key:
+        factors = {}
+        for loan_type, interest_rate, max_term in key:
+            r = interest_rate / (100 * 12)
+            rows = []
+            for term in range(1, max_term + 1):
+                growth = (1 + r) ** (term * 12)
+                rows.append((r, growth, r * growth / (growth - 1)))
+            factors[loan_type] = rows
+        _cache['key'], _cache['factors'] = key, factors
+    return _cache['factors']
+
+
+def _factors_for(loan_type_name):
+    loan_type = find_loan_type(loan_type_name)
+    if loan_type is None:
+        raise ValueError(f"Invalid loan type: {loan_type_name}")
+    return annuity_factors()[loan_type["loan_type"]]
+
+
+def _check_income(monthly_income):
+    if not (isfinite(monthly_income) and monthly_income > 0):
+        raise ValueError(f"Monthly income must be a positive number, got {monthly_income}.")
+
+
+def _installment(loan_amount, r, growth):
+    # Same operation order as calculate_installment.
+    return round((loan_amount * r * growth) / (growth - 1), 2)
+
+
+def _passes(loan_amount, monthly_income, r, growth):
+    return _installment(loan_amount, r, growth) / monthly_income <= MAX_DEBT_RATIO
+
+
+def quote_payment(loan_type_name, loan_amount, term):
+    """Monthly payment for a loan, or None if the term is not allowed."""
+    factors = _factors_for(loan_type_name)
+    if not 1 <= term <= len(factors):
+        return None
+    r, growth, _ = factors[term - 1]
+    return _installment(loan_amount, r, growth)
+
+
+def max_affordable_amount(loan_type_name, monthly_income, term):
+    """Largest amount, in whole cents, that passes the debt ratio check at this term."""
+    _check_income(monthly_income)
+    factors = _factors_for(loan_type_name)
+    if not 1 <= term <= len(factors):
+        raise ValueError(f"Term must be between 1 and {len(factors)} years for {loan_type_name}.")
+    r, growth, factor = factors[term - 1]
+    # Start from the unrounded bound and correct by a cent or two for rounding.
+    cents = floor(MAX_DEBT_RATIO * monthly_income / factor * 100)
+    while _passes((cents + 1) / 100, monthly_income, r, growth):
+        cents += 1
+    while cents > 0 and not _passes(cents / 100, monthly_income, r, growth):
+        cents -= 1
+    return cents / 100
+
+
+def shortest_passing_term(loan_type_name, monthly_income, loan_amount):
+    """Shortest term in years that passes the debt ratio check, or None if none does."""
+    _check_income(monthly_income)
+    factors = _factors_for(loan_type_name)
+    # Payments fall as the term grows, so the first passing term can be bisected.
+    term = bisect_left(range(len(factors)), True,
+                       key=lambda i: _passes(loan_amount, monthly_income, *factors[i][:2])) + 1
+    return term if term <= len(factors) else None
+
+
+def quote_grid(loan_type_name, monthly_income, amounts, terms=None):
+    """Payments and approve/deny outcomes for every amount x term combination.
+
+    Returns a dict with the amounts and terms used, a payments matrix of
+    shape (amounts, terms) and a matching boolean approved matrix. Terms
+    default to every allowed term for the loan type.
+    """
+    _check_income(monthly_income)
+    factors = _factors_for(loan_type_name)
+    terms = np.arange(1, len(factors) + 1) if terms is None else np.asarray(terms, dtype=np.int64)
+    if ((terms < 1) | (terms > len(factors))).any():
+        raise ValueError(f"Term must be between 1 and {len(factors)} years for {loan_type_name}.")
+    amounts = np.asarray(amounts, dtype=np.float64)
+    r = factors[0][0]
+    growth = np.array([factors[t - 1][1] for t in terms.tolist()])
+    payments = round_cents((amounts[:, None] * r * growth[None, :]) / (growth[None, :] - 1))
+    return {
+        'amounts':  amounts,
+        'terms':    terms,
+        'payments': payments,
+        'approved': payments / monthly_income <= MAX_DEBT_RATIO,
+    }
@@ -0,0 +1,226 @@
+import atexit
+import csv
+import io
+import logging
+import os
+import threading
+import time
+from csv import DictWriter
+
+logger = logging.getLogger(__name__)
+
+FIELD_NAMES = ['loan_type', 'loan_amount', 'interest_rate', 'term',
+               'monthly_payment', 'total_interest', 'status', 'monthly_income']
+
+# How hard each flush tries to get rows onto the disk.
+NO_SYNC = 'none'       # leave it to the OS
+SYNC_BATCH = 'batch'   # fsync once per flushed batch
+SYNC_ROW = 'row'       # flush and fsync after every row
+
+
+def _existing_header(file_path, field_names):
+    """The header row of a non-empty file_path, or None if it has none."""
+    try:
+        with open(file_path, newline='') as file:
+            row = next(csv.reader([file.readline()]), None)
+    except FileNotFoundError:
+        return None
+    return row if row and row[0] == field_names[0] else None
+
+
+class RecordWriter:
+    """Keep the loan records file open and write rows in buffered batches.
+
+    Rows are flushed once max_rows are waiting or the oldest one has waited
+    max_delay seconds, whichever comes first. Safe to share between threads.
+
+    Rows may carry keys beyond field_names; those are not written but are
+    passed on to listeners. A file that already has a header keeps its
+    layout: rows are written with the columns it names, so an older 7-column
+    file gets no monthly_income until it is migrated with
+    records.migrate_records_file().
+    """
+
+    def __init__(self, file_path='loan_records.csv', field_names=FIELD_NAMES,
+                 max_rows=512, max_delay=1.0, durability=NO_SYNC):
+        if durability not in (NO_SYNC, SYNC_BATCH, SYNC_ROW):
+            raise ValueError(f"Unknown durability: {durability}")
+        self.file_path = file_path
+        self.max_rows = 1 if durability == SYNC_ROW else max_rows
+        self.max_delay = max_delay
+        self.durability = durability
+        self.rows_written = 0
+        self._buffer = []
+        self._oldest = None
+        self._lock = threading.Lock()
+        self._closed = threading.Event()
+        self._listeners = []
+
+        # Rows are rendered to text first and written with unbuffered writes,
+        # so a failed flush can be rolled back and retried without duplicates.
+        self.field_names = _existing_header(file_path, field_names) or field_names
+        self._text = io.StringIO()
+        self._writer = DictWriter(self._text, fieldnames=self.field_names, extrasaction='ignore')
+        self._file = open(file_path, 'ab', buffering=0)
+        if self._file.tell() == 0:
+            self._writer.writeheader()
+            self._write_text()
+
+        self._timer = threading.Thread(target=self._flush_when_due, daemon=True)
+        self._timer.start()
+
+    def add_listener(self, listener, catch_up=None):
+        """Call listener(rows, offset) after each flush.
+
+        rows are the dicts just written and offset is where they end in the file.
+        Listeners run while the writer is locked, so they should be quick. An
+        error in one is logged and does not affect the write or other listeners.
+
+        If given, catch_up() is called after flushing and before the listener
+        is added, all under the lock, so it can read the whole file without
+        missing rows written in the meantime.
+        """
+        with self._lock:
+            if catch_up is not None:
+                self._flush_locked()
+                catch_up()
+            self._listeners.append(listener)
+
+    def remove_listener(self, listener):
+        """Stop calling a listener added with add_listener."""
+        with self._lock:
+            self._listeners.remove(listener)
+
+    def write(self, row):
+        """Queue one loan_data dict for writing."""
+        self.write_rows([row])
+
+    def write_rows(self, rows):
+        """Queue many loan_data dicts for writing.
+
+        If this fills the buffer and the flush fails, these rows are dropped
+        again and the error is raised, so the caller knows they were not
+        accepted. Rows queued by earlier calls stay queued.
+        """
+        with self._lock:
+            if self._closed.is_set():
+                raise ValueError("Record writer is closed.")
+            start = len(self._buffer)
+            self._buffer.extend(rows)
+            if self._oldest is None:
+                self._oldest = time.monotonic()
+            if len(self._buffer) >= self.max_rows:
+                try:
+                    self._flush_locked()
+                except BaseException:
+                    del self._buffer[start:]
+                    if not self._buffer:
+                        self._oldest = None
+                    raise
+
+    def flush(self):
+        """Write out every queued row now."""
+        with self._lock:
+            self._flush_locked()
+
+    def close(self):
+        """Flush the remaining rows and close the file.
+
+        The file is closed even if that last flush fails; the error is raised.
+        """
+        with self._lock:
+            if self._closed.is_set():
+                return
+            try:
+                self._flush_locked()
+            finally:
+                self._closed.set()
+                self._file.close()
+        self._timer.join()
+
+    def _write_text(self):
+        """Write the rendered rows to the file, rolling back a partial write on failure."""
+        data = self._text.getvalue().encode()
+        self._text.seek(0)
+        self._text.truncate()
+        start = self._file.tell()
+        try:
+            view = memoryview(data)
+            while view:
+                view = view[self._file.write(view):]
+            if self.durability != NO_SYNC:
+                os.fsync(self._file.fileno())
+        except BaseException:
+            os.ftruncate(self._file.fileno(), start)
+            self._file.seek(start)
+            raise
+
+    def _flush_locked(self):
+        if not self._buffer:
+            return
+        rows = self._buffer
+        self._text.seek(0)
+        self._text.truncate()
+        self._writer.writerows(rows)
+        self._write_text()
+        # Only forget the rows once they are safely written.
+        self.rows_written += len(rows)
+        self._buffer = []
+        self._oldest = None
+        if self._listeners:
+            self._notify(rows, self._file.tell())
+
+    def _notify(self, rows, offset):
+        for listener in self._listeners:
+            try:
+                listener(rows, offset)
+            except Exception:
+                logger.exception("Record listener %r failed", listener)
+
+    def _flush_when_due(self):
+        # Wake up periodically so a quiet writer still honours max_delay.
+        while not self._closed.wait(self.max_delay / 4):
+            try:
+                with self._lock:
+                    if (self._oldest is not None and not self._closed.is_set()
+                            and time.monotonic() - self._oldest >= self.max_delay):
+                        self._flush_locked()
+            except Exception:
+                # Keep the rows buffered and try again on the next tick.
+                logger.exception("Flushing %s failed", self.file_path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+_writers = {}
+_writers_lock = threading.Lock()
+
+
+def get_record_writer(file_path='loan_records.csv', **options):
+    """Return the shared writer for file_path, opening it on first use.
+
+    Writers are shared per absolute path, so after a change of working
+    directory a relative path gets the writer for the new file. Options
+    only apply when the writer is first opened. Shared writers are flushed
+    and closed when the interpreter exits.
+    """
+    key = os.path.abspath(file_path)
+    with _writers_lock:
+        writer = _writers.get(key)
+        if writer is None or writer._closed.is_set():
+            writer = _writers[key] = RecordWriter(file_path, **options)
+        return writer
+
+
+@atexit.register
+def close_record_writers():
+    """Flush and close every shared writer."""
+    with _writers_lock:
+        writers = list(_writers.values())
+        _writers.clear()
+    for writer in writers:
+        writer.close()
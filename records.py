@@ -0,0 +1,284 @@
+"""Indexed, columnar view of loan_records.csv.
+
+The file is streamed once into typed NumPy columns. Legacy rows are
+repaired on the way in and anything unreadable is quarantined with its
+line number. Later calls to refresh() only parse the bytes appended since
+the last one, so the columns, the indexes and the aggregates stay current
+without rescanning the file. If the file was truncated or replaced in the
+meantime, refresh() starts again from the beginning.
+"""
+import csv
+import os
+
+import numpy as np
+
+from record_writer import FIELD_NAMES
+
+
+class _GrowableArray:
+    """A NumPy array with spare capacity so appends are amortised O(1)."""
+
+    def __init__(self, dtype, capacity=1024):
+        self._data = np.empty(capacity, dtype=dtype)
+        self._size = 0
+
+    def extend(self, values):
+        values = np.asarray(values, dtype=self._data.dtype)
+        end = self._size + len(values)
+        if end > len(self._data):
+            grown = np.empty(max(end, 2 * len(self._data)), dtype=self._data.dtype)
+            grown[:self._size] = self._data[:self._size]
+            self._data = grown
+        self._data[self._size:end] = values
+        self._size = end
+
+    def view(self):
+        return self._data[:self._size]
+
+    def __len__(self):
+        return self._size
+
+
+def _number(text):
+    return float(text) if text else np.nan
+
+
+def migrate_records_file(file_path='loan_records.csv'):
+    """Rewrite file_path in the current layout and return how many rows it holds.
+
+    Legacy rows are repaired and unreadable lines kept as they are, so
+    nothing is lost. Rows that never recorded an income get an empty
+    monthly_income. Close any record writer on the file first.
+    """
+    rows = 0
+    temp_path = file_path + '.tmp'
+    with open(file_path, newline='') as source, open(temp_path, 'w', newline='') as target:
+        writer = csv.writer(target)
+        writer.writerow(FIELD_NAMES)
+        for line in source:
+            row = next(csv.reader([line]), None)
+            if not row or is_header(row):
+                continue
+            try:
+                record, _ = repair_row(row)
+            except ValueError:
+                target.write(line if line.endswith('\n') else line + '\n')
+                continue
+            writer.writerow(['' if value != value else value for value in record])
+            rows += 1
+    os.replace(temp_path, file_path)
+    return rows
+
+
+def is_header(row):
+    """True for the header of the current layout or of the 7-field one before monthly_income."""
+    return row == FIELD_NAMES or row == FIELD_NAMES[:7]
+
+
+def repair_row(row):
+    """Return an 8-field record for a CSV row, or raise ValueError.
+
+    Besides the current layout this understands three older ones: 7
+    fields without monthly income, 9 fields with monthly income and debt
+    ratio added, and 'rejected' rows carrying income, debt ratio and a
+    message. The 9-field ones are mapped onto the current fields, with
+    'rejected' recorded as 'denied'. A missing income is NaN.
+    Returns (record, repaired).
+    """
+    if len(row) == 8:
+        record, repaired = row, False
+    elif len(row) == 7:
+        record, repaired = row + [''], False
+    elif len(row) == 9 and row[8] == 'approved':
+        # type, amount, rate, income, term, payment, interest, ratio, status
+        record, repaired = row[:3] + row[4:7] + [row[8], row[3]], True
+    elif len(row) == 9 and row[7] == 'rejected':
+        # type, amount, rate, income, term, payment, ratio, status, message
+        record, repaired = row[:3] + [row[4], row[5], '', 'denied', row[3]], True
+    else:
+        raise ValueError(f"expected 8 fields, got {len(row)}")
+
+    loan_type, amount, rate, term, payment, interest, status, income = record
+    if not loan_type or status not in ('approved', 'denied'):
+        raise ValueError(f"unknown status {status!r}")
+    return (loan_type, float(amount), _number(rate), int(float(term)),
+            _number(payment), _number(interest), status, _number(income)), repaired
+
+
+class LoanRecords:
+    """Columnar loan records with indexes by loan type, status and term.
+
+    Counts and sums come from aggregates kept per (type, status, term)
+    group, so they cost the same however many rows are loaded.
+    """
+
+    def __init__(self, file_path='loan_records.csv'):
+        self.file_path = file_path
+        self.statuses = ['approved', 'denied']
+        self._reset()
+        self.refresh()
+
+    def _reset(self):
+        self.loan_types = []     # code -> loan type name
+        self.quarantine = []     # (line_number, raw_line, reason)
+        self.repaired = 0
+        self._type_codes = {}
+        self._columns = {
+            'loan_type':       _GrowableArray(np.int32),
+            'loan_amount':     _GrowableArray(np.float64),
+            'interest_rate':   _GrowableArray(np.float64),
+            'term':            _GrowableArray(np.int32),
+            'monthly_payment': _GrowableArray(np.float64),
+            'total_interest':  _GrowableArray(np.float64),
+            'status':          _GrowableArray(np.int8),
+            'monthly_income':  _GrowableArray(np.float64),
+        }
+        self._indexes = {'loan_type': {}, 'status': {}, 'term': {}}
+        # (type code, status code, term) -> [count, amount, payment sum, payment count, interest]
+        self._groups = {}
+        self._offset = 0
+        self._file_id = None
+        self._line_number = 0
+
+    def __len__(self):
+        return len(self._columns['status'])
+
+    @property
+    def columns(self):
+        """The typed columns, with loan_type and status as integer codes."""
+        return {name: column.view() for name, column in self._columns.items()}
+
+    def refresh(self):
+        """Load rows appended since the last refresh and return how many were added.
+
+        A file that shrank below what was already loaded, or was replaced
+        by another file, is reloaded from the start.
+        """
+        try:
+            with open(self.file_path, 'rb') as file:
+                stat = os.fstat(file.fileno())
+                file_id = (stat.st_dev, stat.st_ino)
+                if stat.st_size < self._offset or self._file_id not in (None, file_id):
+                    self._reset()
+                self._file_id = file_id
+                file.seek(self._offset)
+                data = file.read()
+        except FileNotFoundError:
+            return 0
+        end = data.rfind(b'\n') + 1
+        if not end:
+            return 0
+        self._offset += end
+        return self._load_lines(data[:end].decode().splitlines())
+
+    def _load_lines(self, lines):
+        parsed = []
+        for line, row in zip(lines, csv.reader(lines)):
+            self._line_number += 1
+            if not row or is_header(row):
+                continue
+            try:
+                record, repaired = repair_row(row)
+            except ValueError as error:
+                self.quarantine.append((self._line_number, line, str(error)))
+                continue
+            self.repaired += repaired
+            parsed.append(record)
+        if parsed:
+            self._append(parsed)
+        return len(parsed)
+
+    def _append(self, records):
+        start = len(self)
+        loan_type, amount, rate, term, payment, interest, status, income = zip(*records)
+        type_codes = [self._type_code(name) for name in loan_type]
+        status_codes = [self._status_code(s) for s in status]
+        columns = {
+            'loan_type': type_codes, 'loan_amount': amount, 'interest_rate': rate,
+            'term': term, 'monthly_payment': payment, 'total_interest': interest,
+            'status': status_codes, 'monthly_income': income,
+        }
+        for name, values in columns.items():
+            self._columns[name].extend(values)
+
+        row_ids = np.arange(start, start + len(records))
+        for name, keys in (('loan_type', type_codes), ('status', status_codes), ('term', term)):
+            keys = np.asarray(keys)
+            index = self._indexes[name]
+            for key in np.unique(keys).tolist():
+                index.setdefault(key, _GrowableArray(np.int64)).extend(row_ids[keys == key])
+
+        for t, s, n, a, p, i in zip(type_codes, status_codes, term, amount, payment, interest):
+            group = self._groups.get((t, s, n))
+            if group is None:
+                group = self._groups[(t, s, n)] = [0, 0.0, 0.0, 0, 0.0]
+            group[0] += 1
+            group[1] += a
+            if p == p:
+                group[2] += p
+                group[3] += 1
+            if i == i:
+                group[4] += i
+
+    def _type_code(self, name):
+        code = self._type_codes.get(name)
+        if code is None:
+            code = self._type_codes[name] = len(self.loan_types)
+            self.loan_types.append(name)
+        return code
+
+    def _status_code(self, status):
+        try:
+            return self.statuses.index(status)
+        except ValueError:
+            raise ValueError(f"unknown status {status!r}, expected one of {self.statuses}") from None
+
+    def _matching_groups(self, loan_type=None, status=None, term=None):
+        type_code = self._type_codes.get(loan_type, -1) if loan_type is not None else None
+        status_code = self._status_code(status) if status is not None else None
+        for (t, s, n), group in self._groups.items():
+            if ((type_code is None or t == type_code) and (status_code is None or s == status_code)
+                    and (term is None or n == term)):
+                yield t, group
+
+    def select(self, loan_type=None, status=None, term=None):
+        """Return the sorted row ids matching every given filter."""
+        keys = (('loan_type', self._type_codes.get(loan_type, -1) if loan_type is not None else None),
+                ('status', self._status_code(status) if status is not None else None),
+                ('term', term))
+        postings = [self._indexes[name].get(key) for name, key in keys if key is not None]
+        if not postings:
+            return np.arange(len(self))
+        if any(p is None for p in postings):
+            return np.empty(0, dtype=np.int64)
+        postings.sort(key=len)
+        rows = postings[0].view()
+        if len(postings) == 1:
+            return rows.copy()   # the view would expose the index itself
+        for other in postings[1:]:
+            rows = np.intersect1d(rows, other.view(), assume_unique=True)
+        return rows
+
+    def count(self, **filters):
+        """Number of records matching the filters."""
+        return sum(group[0] for _, group in self._matching_groups(**filters))
+
+    def sum_amount(self, **filters):
+        """Total loan_amount of the matching records."""
+        return sum(group[1] for _, group in self._matching_groups(**filters))
+
+    def mean_payment(self, **filters):
+        """Mean monthly_payment of matching records that have one, or None."""
+        total = count = 0
+        for _, group in self._matching_groups(**filters):
+            total += group[2]
+            count += group[3]
+        return total / count if count else None
+
+    def total_interest_by_type(self, status='approved', term=None):
+        """Total interest per loan type for the matching records."""
+        totals = {}
+        for t, group in self._matching_groups(status=status, term=term):
+            name = self.loan_types[t]
+            totals[name] = totals.get(name, 0.0) + group[4]
+        return totals
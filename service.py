@@ -0,0 +1,265 @@
+"""Local asyncio HTTP/JSON service for loan decisions.
+
+POST /applications with one application object, or a list of them:
+
+    {"loan_type": "housing", "monthly_income": 3000, "loan_amount": 50000, "term": 10}
+
+An optional "idempotency_key" marks retries of the same application;
+repeats get the first decision back and are not recorded again. A key
+reused for a different application is refused: alone it gets a 422, and
+in a list it gets an error object in its place.
+
+GET /metrics returns per-stage timings in the Prometheus text format when
+the service is started with --instrument.
+
+GET /stats returns running portfolio statistics. They are restored at
+startup from a snapshot plus the records written after it, and
+checkpointed every --checkpoint-every seconds and on shutdown.
+
+Decisions are made on the event loop; records are handed to the shared
+record writer on a worker thread so disk writes never stall it.
+
+Run with: python service.py --port 8080
+"""
+import argparse
+import asyncio
+import json
+import logging
+import math
+
+import instrumentation
+import loan_core
+from idempotency import ApplicationCache, IdempotencyKeyReused, cache_key, decide_once
+from portfolio_stats import load_portfolio_stats
+from record_writer import close_record_writers, get_record_writer
+
+logger = logging.getLogger(__name__)
+
+APPLICATION_FIELDS = ('loan_type', 'monthly_income', 'loan_amount', 'term')
+
+STATUS_TEXT = {200: 'OK', 400: 'Bad Request', 404: 'Not Found',
+               405: 'Method Not Allowed', 413: 'Payload Too Large', 422: 'Unprocessable Entity',
+               500: 'Internal Server Error'}
+
+MAX_BODY = 16 * 1024 * 1024
+
+
+def _reject_constant(name):
+    raise ValueError(f"{name} is not allowed")
+
+
+class RequestError(Exception):
+    """A client error to report with an HTTP status code."""
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+def parse_application(application):
+    """Check an application object and return its decision arguments and idempotency key."""
+    if not isinstance(application, dict):
+        raise RequestError(400, "Each application must be a JSON object.")
+    missing = [f for f in APPLICATION_FIELDS if f not in application]
+    if missing:
+        raise RequestError(400, f"Missing fields: {', '.join(missing)}.")
+    loan_type = application['loan_type']
+    numbers = [application[f] for f in APPLICATION_FIELDS[1:]]
+    if (not isinstance(loan_type, str) or not loan_type.split()
+            or any(isinstance(n, bool) or not isinstance(n, (int, float)) for n in numbers)):
+        raise RequestError(400, "loan_type must be a name and the other fields numbers.")
+    try:
+        finite = all(math.isfinite(n) for n in numbers)
+    except OverflowError:
+        finite = False
+    if not finite:
+        raise RequestError(400, "Numbers must be finite.")
+    monthly_income, loan_amount, term = numbers
+    if monthly_income <= 0 or loan_amount <= 0 or term != int(term):
+        raise RequestError(400, "Income and amount must be positive and term a whole number of years.")
+    idempotency_key = application.get('idempotency_key')
+    if idempotency_key is not None and not isinstance(idempotency_key, str):
+        raise RequestError(400, "idempotency_key must be a string.")
+    args = (loan_type, float(monthly_income), float(loan_amount), int(term))
+    return args, idempotency_key
+
+
+def decide(applications, cache):
+    """Decide a list of parsed applications.
+
+    Returns the response bodies, the new records and the cache keys of the
+    new decisions. Repeated applications reuse the cached decision and add
+    no record. An application whose idempotency key belongs to a different
+    one gets an error body and no decision.
+    """
+    responses, records, keys = [], [], []
+    for args, idempotency_key in applications:
+        try:
+            (success, result, loan_data), hit = decide_once(
+                cache, args, idempotency_key, lambda: loan_core.decide_loan_application(*args))
+        except IdempotencyKeyReused as error:
+            responses.append({'error': str(error)})
+            continue
+        if success:
+            responses.append({'approved': True, 'loan': result})
+        else:
+            responses.append({'approved': False, 'message': result, 'loan': loan_data})
+        if not hit:
+            records.append(dict(loan_data, monthly_income=args[1]))
+            keys.append(cache_key(*args, idempotency_key))
+    return responses, records, keys
+
+
+class LoanService:
+    """Serve loan decisions over HTTP/1.1 with keep-alive."""
+
+    def __init__(self, records_path='loan_records.csv', snapshot_path='portfolio_stats.json'):
+        self.records = get_record_writer(records_path)
+        self.stats = load_portfolio_stats(records_path, snapshot_path)
+        self.snapshot_path = snapshot_path
+        self.cache = ApplicationCache()
+        self.decisions = 0
+
+    def close(self):
+        """Stop following the record writer."""
+        self.records.remove_listener(self.stats.update)
+
+    async def checkpoint_every(self, seconds):
+        """Write a stats snapshot every few seconds, off the event loop."""
+        loop = asyncio.get_running_loop()
+        while True:
+            await asyncio.sleep(seconds)
+            await loop.run_in_executor(None, self.stats.checkpoint, self.snapshot_path)
+
+    async def handle_request(self, method, path, body):
+        """Return (status, payload) for one HTTP request."""
+        if path == '/health':
+            return 200, {'status': 'ok', 'decisions': self.decisions,
+                         'cache': self.cache.stats()}
+        if path == '/stats':
+            return 200, self.stats.summary()
+        if path == '/metrics':
+            return 200, instrumentation.export_prometheus()
+        if path != '/applications':
+            raise RequestError(404, "Unknown path.")
+        if method != 'POST':
+            raise RequestError(405, "Use POST.")
+        try:
+            payload = json.loads(body, parse_constant=_reject_constant)
+        except (ValueError, RecursionError):
+            raise RequestError(400, "Body must be JSON.") from None
+
+        batched = isinstance(payload, list)
+        applications = [parse_application(a) for a in (payload if batched else [payload])]
+        responses, records, keys = decide(applications, self.cache)
+        try:
+            await asyncio.get_running_loop().run_in_executor(None, self.records.write_rows, records)
+        except BaseException:
+            # Unsaved decisions must not be served from the cache, or a retry would never save them.
+            for key in keys:
+                self.cache.discard(key)
+            raise
+        self.decisions += len(records)
+        if not batched and 'error' in responses[0]:
+            raise RequestError(422, responses[0]['error'])
+        return 200, (responses if batched else responses[0])
+
+    async def handle_connection(self, reader, writer):
+        """Read requests from one connection until the client closes it."""
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                try:
+                    method, path, version = request_line.decode('latin-1').split()
+                except ValueError:
+                    break
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b'\r\n', b'\n', b''):
+                        break
+                    name, _, value = line.decode('latin-1').partition(':')
+                    headers[name.strip().lower()] = value.strip()
+
+                keep_alive = (headers.get('connection', '').lower() != 'close'
+                              and version == 'HTTP/1.1')
+                try:
+                    try:
+                        length = int(headers.get('content-length', 0) or 0)
+                    except ValueError:
+                        length = -1
+                    if length < 0:
+                        # Without a usable length the body cannot be skipped.
+                        keep_alive = False
+                        raise RequestError(400, "Invalid Content-Length.")
+                    if length > MAX_BODY:
+                        keep_alive = False
+                        raise RequestError(413, "Request body too large.")
+                    body = await reader.readexactly(length) if length else b''
+                    status, payload = await self.handle_request(method, path, body)
+                except RequestError as error:
+                    status, payload = error.status, {'error': str(error)}
+                except (asyncio.IncompleteReadError, ConnectionError):
+                    raise
+                except Exception:
+                    logger.exception("Failed to handle %s %s", method, path)
+                    status, payload = 500, {'error': "Internal server error."}
+                    keep_alive = False
+
+                if isinstance(payload, str):
+                    data, content_type = payload.encode(), 'text/plain; version=0.0.4'
+                else:
+                    data, content_type = json.dumps(payload).encode(), 'application/json'
+                writer.write(
+                    f"HTTP/1.1 {status} {STATUS_TEXT[status]}\r\n"
+                    f"Content-Type: {content_type}\r\n"
+                    f"Content-Length: {len(data)}\r\n"
+                    f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode() + data)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+
+async def serve(host='127.0.0.1', port=8080, records_path='loan_records.csv',
+                snapshot_path='portfolio_stats.json', checkpoint_every=30.0):
+    """Run the service until cancelled, flushing records and stats on the way out."""
+    loop = asyncio.get_running_loop()
+    service = await loop.run_in_executor(None, LoanService, records_path, snapshot_path)
+    server = await asyncio.start_server(service.handle_connection, host, port)
+    checkpoints = asyncio.create_task(service.checkpoint_every(checkpoint_every))
+    print(f"Serving loan decisions on http://{host}:{port}")
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        checkpoints.cancel()
+        await loop.run_in_executor(None, close_record_writers)
+        await loop.run_in_executor(None, service.stats.checkpoint, snapshot_path)
+        service.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Loan decision HTTP service.")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--records', default='loan_records.csv')
+    parser.add_argument('--snapshot', default='portfolio_stats.json')
+    parser.add_argument('--checkpoint-every', type=float, default=30.0)
+    parser.add_argument('--instrument', action='store_true', help="record per-stage timings")
+    args = parser.parse_args()
+    if args.instrument:
+        instrumentation.instrument()
+    try:
+        asyncio.run(serve(args.host, args.port, args.records, args.snapshot, args.checkpoint_every))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,177 @@
+"""Monte Carlo stress tests of the approved book under rate and income shocks.
+
+Each scenario shifts the rate of every loan of a type by the same random
+amount, up to +/- rate_shock_bps basis points, and cuts incomes by a
+random 0 to income_drop_pct percent. Payments are then recalculated the way
+calculate_installment does and checked against the 0.5 debt ratio.
+
+Scenarios are split into shards and run on a process pool. Each shard is
+computed as whole (scenarios x loans) arrays, so the work scales with the
+number of cores.
+
+Incomes come from the monthly_income column of loan_records.csv. Loans
+recorded without one still count towards the payment increases, but the
+newly failing share only covers loans with a known income, and is not
+reported at all when there are none.
+Files from before the monthly_income column keep their 7-column layout
+until they are migrated with records.migrate_records_file().
+
+Run with: python stress.py --scenarios 10000 --rate-shock-bps 200 --income-drop-pct 20
+"""
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from loan_core import loan_types
+from loan_math import round_cents
+from records import LoanRecords
+
+MAX_DEBT_RATIO = 0.5
+MIN_RATE = 0.01   # percent; keeps the annuity formula defined if a shock goes below zero
+
+_portfolio = None
+
+
+def load_stress_portfolio(records_path='loan_records.csv'):
+    """Return the approved book as arrays: type code, amount, rate, term, payment and income.
+
+    Type codes index loan_types; approved loans of unknown types are skipped.
+    Income is NaN where the record has none.
+    """
+    records = LoanRecords(records_path)
+    rows = records.select(status='approved')
+    columns = {name: column[rows] for name, column in records.columns.items()}
+    index_by_type = {lt["loan_type"]: i for i, lt in enumerate(loan_types)}
+    type_code = np.array([index_by_type.get(records.loan_types[c], -1)
+                          for c in columns['loan_type'].tolist()], dtype=np.int64)
+    known = type_code >= 0
+    return {
+        'type':    type_code[known],
+        'amount':  columns['loan_amount'][known],
+        'rate':    columns['interest_rate'][known],
+        'term':    columns['term'][known].astype(np.int64),
+        'payment': columns['monthly_payment'][known],
+        'income':  columns['monthly_income'][known],
+    }
+
+
+def generate_scenarios(count, rate_shock_bps=200.0, income_drop_pct=20.0, seed=0):
+    """Return (rate shifts in percent per loan type, income multipliers) for count scenarios."""
+    if count < 1:
+        raise ValueError(f"Need at least one scenario, got {count}.")
+    rng = np.random.default_rng(seed)
+    rate_shifts = rng.uniform(-rate_shock_bps, rate_shock_bps, size=(count, len(loan_types))) / 100
+    income_factors = 1 - rng.uniform(0, income_drop_pct, size=count) / 100
+    return rate_shifts, income_factors
+
+
+def run_shard(portfolio, rate_shifts, income_factors):
+    """Stress one shard of scenarios; returns per-scenario metric arrays."""
+    if not len(portfolio['amount']):
+        zeros = np.zeros(len(income_factors))
+        return {'newly_failing': zeros.astype(np.int64), 'mean_increase': zeros,
+                'max_increase': zeros, 'total_increase': zeros}
+    # Loans sharing a type, rate and term share their shocked rate and power
+    # term, so those are computed once per distinct triple and gathered.
+    triples, triple_index = np.unique(
+        np.stack([portfolio['type'], portfolio['rate'], portfolio['term']]), axis=1, return_inverse=True)
+    triple_index = triple_index.reshape(-1)
+    triple_types = triples[0].astype(np.int64)
+    r = np.maximum(triples[1][None, :] + rate_shifts[:, triple_types], MIN_RATE) / (100 * 12)
+    growth = (1 + r) ** (triples[2] * 12)[None, :]
+    r, growth = r[:, triple_index], growth[:, triple_index]
+    payments = round_cents((portfolio['amount'][None, :] * r * growth) / (growth - 1))
+
+    # Comparisons with a NaN income are False, so loans without one never count.
+    incomes = portfolio['income'][None, :] * income_factors[:, None]
+    was_passing = portfolio['payment'] / portfolio['income'] <= MAX_DEBT_RATIO
+    newly_failing = (payments / incomes > MAX_DEBT_RATIO) & was_passing[None, :]
+    increase = payments - portfolio['payment'][None, :]
+    return {
+        'newly_failing':      newly_failing.sum(axis=1),
+        'mean_increase':      increase.mean(axis=1),
+        'max_increase':       increase.max(axis=1),
+        'total_increase':     increase.sum(axis=1),
+    }
+
+
+def _init_worker(portfolio):
+    global _portfolio
+    _portfolio = portfolio
+
+
+def _run_shard_in_worker(rate_shifts, income_factors, chunk_size):
+    results = []
+    for start in range(0, len(income_factors), chunk_size):
+        chunk = slice(start, start + chunk_size)
+        results.append(run_shard(_portfolio, rate_shifts[chunk], income_factors[chunk]))
+    return {name: np.concatenate([r[name] for r in results]) for name in results[0]}
+
+
+def stress_test(portfolio, rate_shifts, income_factors, workers=None, chunk_size=64):
+    """Run every scenario across a process pool and return per-scenario metrics.
+
+    Scenarios are split into one shard per worker and each worker computes
+    chunk_size scenarios at a time to keep memory bounded.
+    """
+    if not len(income_factors):
+        raise ValueError("Need at least one scenario.")
+    workers = workers or os.cpu_count() or 1
+    shards = np.array_split(np.arange(len(income_factors)), workers)
+    shards = [s for s in shards if len(s)]
+    if workers == 1:
+        _init_worker(portfolio)
+        parts = [_run_shard_in_worker(rate_shifts, income_factors, chunk_size)]
+    else:
+        with ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(portfolio,)) as pool:
+            parts = list(pool.map(_run_shard_in_worker, [rate_shifts[s] for s in shards],
+                                  [income_factors[s] for s in shards], [chunk_size] * len(shards)))
+    return {name: np.concatenate([p[name] for p in parts]) for name in parts[0]}
+
+
+def summarize(metrics, portfolio):
+    """Percentiles across scenarios of the newly failing share and the payment increases.
+
+    The newly failing figures are None when no loan has a known income.
+    """
+    loans = len(portfolio['amount'])
+    with_income = int(np.count_nonzero(~np.isnan(portfolio['income'])))
+    summary = {'scenarios': len(metrics['newly_failing']), 'loans': loans, 'loans_with_income': with_income}
+    for name, values in (('newly_failing_pct', metrics['newly_failing'] / max(with_income, 1) * 100),
+                         ('mean_payment_increase', metrics['mean_increase']),
+                         ('max_payment_increase', metrics['max_increase'])):
+        summary[name] = {f'p{q}': round(float(np.percentile(values, q)), 4) for q in (5, 50, 95, 99)}
+    summary['worst_newly_failing'] = int(metrics['newly_failing'].max(initial=0))
+    if not with_income:
+        summary['newly_failing_pct'] = summary['worst_newly_failing'] = None
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Stress test the approved loan book.")
+    parser.add_argument('--records', default='loan_records.csv')
+    parser.add_argument('--scenarios', type=int, default=10000)
+    parser.add_argument('--rate-shock-bps', type=float, default=200.0)
+    parser.add_argument('--income-drop-pct', type=float, default=20.0)
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+    if args.scenarios < 1:
+        parser.error("--scenarios must be at least 1")
+
+    portfolio = load_stress_portfolio(args.records)
+    rate_shifts, income_factors = generate_scenarios(args.scenarios, args.rate_shock_bps,
+                                                     args.income_drop_pct, args.seed)
+    start = time.perf_counter()
+    metrics = stress_test(portfolio, rate_shifts, income_factors, args.workers)
+    summary = summarize(metrics, portfolio)
+    summary['seconds'] = round(time.perf_counter() - start, 3)
+    for key, value in summary.items():
+        print(f"{key:>22}: {value}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+import random
+
+import numpy as np
+import pytest
+
+from amortization import amortization_schedule, portfolio_balances, portfolio_cash_flows
+from loan_core import calculate_installment, loan_types
+from loan_math import calculate_installments, round_cents
+
+
+def random_loans(count, seed):
+    rng = random.Random(seed)
+    loans = []
+    for _ in range(count):
+        lt = rng.choice(loan_types)
+        loans.append((round(rng.uniform(500, 300000), 2), lt['interest_rate'],
+                      rng.randint(1, lt['max_term'])))
+    return loans
+
+
+@pytest.mark.parametrize('seed', range(3))
+def test_calculate_installments_matches_scalar(seed):
+    amounts, rates, terms = zip(*random_loans(2000, seed))
+    expected = [calculate_installment(*loan) for loan in zip(amounts, rates, terms)]
+    assert calculate_installments(amounts, rates, terms).tolist() == expected
+
+
+def test_round_cents_matches_round_near_ties():
+    values = np.array([[0.125, 0.135, 1.005], [2.675, 1.115, -0.245]])
+    assert round_cents(values).tolist() == [[round(v, 2) for v in row] for row in values.tolist()]
+
+
+def test_schedule_pays_off_exactly():
+    schedule = list(amortization_schedule(25000.0, 7.5, 5))
+    assert len(schedule) == 60
+    assert schedule[-1]['balance'] == 0
+    assert round(sum(month['principal'] for month in schedule), 2) == 25000.0
+    assert all(month['payment'] == calculate_installment(25000.0, 7.5, 5) for month in schedule[:-1])
+
+
+def test_portfolio_balances_match_scalar_schedules():
+    loans = random_loans(200, seed=7)
+    balances = portfolio_balances(*zip(*loans))
+    assert balances.shape == (200, max(term for _, _, term in loans) * 12)
+    for row, loan in zip(balances, loans):
+        expected = [month['balance'] for month in amortization_schedule(*loan)]
+        assert row[:len(expected)].tolist() == expected
+        assert not row[len(expected):].any()
+
+
+def test_cash_flows_are_chunk_size_independent():
+    amounts, rates, terms = zip(*random_loans(300, seed=3))
+    whole = portfolio_cash_flows(amounts, rates, terms)
+    chunked = portfolio_cash_flows(amounts, rates, terms, chunk_size=7)
+    for name in whole:
+        np.testing.assert_allclose(chunked[name], whole[name], rtol=0, atol=1e-6)
+    assert whole['principal'].sum() == pytest.approx(sum(amounts))
@@ -0,0 +1,58 @@
+import csv
+import json
+import random
+
+from batch import batch_rows, process_loan_batch, read_application_chunks, save_loan_batch
+from loan_core import decide_loan_application
+from record_writer import FIELD_NAMES, close_record_writers
+
+NAMES = ["Housing Loan", "auto", "Personal Loan", "PERSONAL", "boat", "Auto  Loan", "", "  "]
+
+
+def random_applications(size, seed):
+    rng = random.Random(seed)
+    return (
+        [rng.choice(NAMES) for _ in range(size)],
+        [round(rng.uniform(1, 5000), 2) for _ in range(size)],
+        [round(rng.uniform(1, 300000), rng.choice([0, 2])) for _ in range(size)],
+        [rng.randint(-1, 27) for _ in range(size)],
+    )
+
+
+def test_batch_matches_scalar_decisions():
+    names, incomes, amounts, terms = random_applications(20000, seed=1)
+    results = process_loan_batch(names, incomes, amounts, terms)
+    for i, row in enumerate(batch_rows(results)):
+        success, result, loan_data = decide_loan_application(names[i], incomes[i], amounts[i], terms[i])
+        assert row == dict(loan_data, monthly_income=incomes[i])
+        assert (results['status'][i] == 'approved') == success
+        if not success:
+            assert results['message'][i] == result
+
+
+def test_empty_batch():
+    results = process_loan_batch([], [], [], [])
+    assert len(results['status']) == 0
+    assert list(batch_rows(results)) == []
+
+
+def test_read_application_chunks_streams_in_chunks(workdir):
+    applications = [{'loan_type': 'auto', 'monthly_income': 1000, 'loan_amount': 500 + i, 'term': 2}
+                    for i in range(7)]
+    with open('apps.jsonl', 'w') as file:
+        for application in applications:
+            file.write(json.dumps(application) + '\n')
+        file.write('\n')
+    chunks = list(read_application_chunks('apps.jsonl', chunk_size=3))
+    assert [len(c['term']) for c in chunks] == [3, 3, 1]
+    assert sum((c['loan_amount'] for c in chunks), []) == [a['loan_amount'] for a in applications]
+
+
+def test_save_loan_batch_appends_rows(workdir):
+    save_loan_batch(process_loan_batch(["housing", "boat"], [1000, 1], [500.0, 5.0], [3, 2]))
+    close_record_writers()
+    with open('loan_records.csv', newline='') as file:
+        rows = list(csv.reader(file))
+    assert rows[0] == FIELD_NAMES
+    assert rows[1] == ['housing', '500.0', '5.2', '3', '15.03', '41.08', 'approved', '1000.0']
+    assert rows[2] == ['boat', '5.0', '', '2', '', '', 'denied', '1.0']
@@ -0,0 +1,23 @@
+import pytest
+
+from benchmarks import BENCHMARKS, compare, run_benchmarks
+
+
+@pytest.mark.parametrize('name', ['records_load', 'binary_store'])
+def test_read_benchmarks_run_on_their_own(workdir, name):
+    result = run_benchmarks(size=300, repeat=2, names=[name])[name]
+    assert result['per_sec'] == pytest.approx(300 / result['seconds'], rel=1e-3)
+
+
+def test_every_benchmark_runs_and_counts_its_items(workdir):
+    results = run_benchmarks(size=200, repeat=1)
+    assert list(results) == list(BENCHMARKS)
+    repeats = results['idempotent_repeats']
+    assert repeats['per_sec'] == pytest.approx(400 / repeats['seconds'], rel=1e-3)
+    assert list(workdir.iterdir()) == []
+
+
+def test_compare_flags_slowdowns_over_tolerance():
+    baseline = {'a': {'seconds': 1.0}, 'b': {'seconds': 1.0}}
+    results = {'a': {'seconds': 1.05}, 'b': {'seconds': 1.5}, 'c': {'seconds': 9.0}}
+    assert compare(results, baseline) == {'b': 0.5}
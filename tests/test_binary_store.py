@@ -0,0 +1,72 @@
+import csv
+import threading
+
+import numpy as np
+import pytest
+
+from binary_store import MAGIC, BinaryStore, benchmark, csv_to_store, store_to_csv
+from record_writer import FIELD_NAMES
+
+ROWS = [
+    ['auto', '1000.0', '7.5', '3', '31.11', '119.96', 'approved', '2500.0'],
+    ['boat', '5000.0', '', '4', '', '', 'denied', '1000.0'],
+    ['housing', '900000.0', '5.2', '10', '9631.85', '', 'denied', ''],
+]
+
+
+def write_csv(path, rows):
+    with open(path, 'w', newline='') as file:
+        writer = csv.writer(file)
+        writer.writerow(FIELD_NAMES)
+        writer.writerows(rows)
+
+
+def test_csv_round_trip(workdir):
+    write_csv('in.csv', ROWS)
+    store = BinaryStore('store', max_segment_bytes=110)
+    assert csv_to_store('in.csv', store) == 3
+    store.close()
+    assert len(store.segment_paths()) == 2
+    assert store_to_csv(BinaryStore('store'), 'out.csv') == 3
+    with open('out.csv', newline='') as file:
+        assert list(csv.reader(file))[1:] == ROWS
+
+
+def test_concurrent_writers_agree_on_type_codes(workdir):
+    store = BinaryStore('store')
+    names = [f'type{i}' for i in range(50)]
+    threads = [threading.Thread(target=store.write_rows,
+                                args=([[name, 1.0, 1.0, 1, 1.0, 1.0, 'approved', 10.0] for name in names],))
+               for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    store.close()
+    reopened = BinaryStore('store')
+    assert sorted(reopened.loan_types) == sorted(names)
+    assert [row['loan_type'] for row in reopened.rows()] == names * 8
+
+
+@pytest.mark.parametrize('header', [b'NOTLOANS' + bytes(8),
+                                    MAGIC + np.array([40, 0], dtype='<u4').tobytes()])
+def test_bad_segment_headers_are_rejected(workdir, header):
+    store = BinaryStore('store')
+    store.write_rows([ROWS[0]])
+    store.close()
+    path = store.segment_paths()[0]
+    with open(path, 'r+b') as file:
+        file.write(header)
+    with pytest.raises(ValueError):
+        list(store.segments())
+    with pytest.raises(ValueError):
+        store.write_rows([ROWS[0]])
+
+
+def test_benchmark_rebuilds_the_store_each_run(workdir):
+    write_csv('records.csv', ROWS * 10)
+    first = benchmark('records.csv', 'bench_store')
+    second = benchmark('records.csv', 'bench_store')
+    assert first['records'] == second['records'] == first['csv_rows'] == 30
+    assert second['binary_bytes'] == first['binary_bytes']
+    assert second['approved_total'] == 10000.0
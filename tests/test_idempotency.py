@@ -0,0 +1,66 @@
+import threading
+
+import pytest
+
+from idempotency import (ApplicationCache, IdempotencyKeyReused, application_fingerprint,
+                         decide_once, process_loan_application_once)
+from record_writer import close_record_writers
+
+
+def test_fingerprint_ignores_case_spacing_and_number_types():
+    assert (application_fingerprint(' Housing  Loan', 3000, 50000, 10.0)
+            == application_fingerprint('housing loan', 3000.0, 50000.0, 10))
+
+
+def test_concurrent_duplicates_compute_once():
+    cache, calls, release = ApplicationCache(), [], threading.Event()
+
+    def compute():
+        calls.append(1)
+        release.wait(5)
+        return 'decision'
+
+    values = []
+    threads = [threading.Thread(target=lambda: values.append(cache.get_or_compute('k', compute)[0]))
+               for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    release.set()
+    for thread in threads:
+        thread.join()
+    assert calls == [1] and values == ['decision'] * 8
+
+
+def test_lru_eviction_and_ttl_expiry():
+    cache = ApplicationCache(max_entries=2, ttl=0)
+    for key in 'abc':
+        cache.get_or_compute(key, lambda: key)
+    stats = cache.stats()
+    assert stats['evictions'] == 1 and stats['entries'] == 2
+    assert cache.get_or_compute('c', lambda: 'again') == ('again', False)
+    assert cache.stats()['expirations'] == 1
+
+
+def test_failed_compute_is_not_cached():
+    cache = ApplicationCache()
+    with pytest.raises(RuntimeError):
+        cache.get_or_compute('k', lambda: (_ for _ in ()).throw(RuntimeError()))
+    assert cache.get_or_compute('k', lambda: 1) == (1, False)
+
+
+def test_reused_key_with_a_different_application_is_refused():
+    cache = ApplicationCache()
+    application = ('housing', 3000.0, 50000.0, 10)
+    assert decide_once(cache, application, 'abc', lambda: 'first') == ('first', False)
+    assert decide_once(cache, application, 'abc', lambda: 'second') == ('first', True)
+    with pytest.raises(IdempotencyKeyReused):
+        decide_once(cache, ('housing', 3000.0, 60000.0, 10), 'abc', lambda: 'third')
+
+
+def test_process_once_saves_only_the_first_submission(workdir):
+    cache = ApplicationCache()
+    for _ in range(3):
+        assert process_loan_application_once('Auto Loan', 4000, 10000, 3, cache=cache)[0] is True
+    close_record_writers()
+    with open('loan_records.csv') as file:
+        assert len(file.read().splitlines()) == 2
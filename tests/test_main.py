@@ -0,0 +1,89 @@
+import queue
+
+import pytest
+
+import main
+
+
+class FakeWidget:
+    def __init__(self, value=''):
+        self.value = value
+        self.options = {}
+
+    def get(self):
+        return self.value
+
+    def config(self, **options):
+        self.options.update(options)
+
+
+@pytest.fixture
+def fake_ui(monkeypatch):
+    ui = {"submit_button": FakeWidget(), "details_status": FakeWidget(), "pending_decision": None}
+    monkeypatch.setattr(main, 'ui', ui)
+    monkeypatch.setattr(main, 'screens', {})
+    monkeypatch.setattr(main, 'results', queue.Queue())
+    return ui
+
+
+def submit(monkeypatch):
+    callbacks, shown = [], []
+    monkeypatch.setattr(main, 'run_in_background', lambda job, callback: callbacks.append(callback))
+    monkeypatch.setattr(main, 'show_results', lambda *args: shown.append(args))
+    main.submit_loan_application('Auto Loan', FakeWidget('4000'), FakeWidget('10000'), FakeWidget('3'))
+    return callbacks[0], shown
+
+
+def test_decision_result_is_shown(fake_ui, monkeypatch):
+    finished, shown = submit(monkeypatch)
+    assert fake_ui["details_status"].options['text'] == "Processing..."
+    finished((True, {'loan_type': 'auto'}))
+    assert shown == [(True, {'loan_type': 'auto'})]
+    assert fake_ui["submit_button"].options['state'] == main.tk.NORMAL
+
+
+def test_stale_decision_is_dropped_after_navigating_away(fake_ui, monkeypatch):
+    finished, shown = submit(monkeypatch)
+    main.show_loan_options()
+    finished((True, {'loan_type': 'auto'}))
+    assert shown == []
+    assert fake_ui["submit_button"].options['state'] == main.tk.NORMAL
+
+
+def test_bulk_import_reports_any_error(fake_ui, tmp_path, monkeypatch):
+    path = tmp_path / 'apps.jsonl'
+    path.write_text('{"loan_type": "auto", "monthly_income": 1, "loan_amount": 1, "term": 1}\n')
+
+    def broken(*args):
+        raise RuntimeError("batch engine bug")
+
+    monkeypatch.setattr(main, 'process_loan_batch', broken)
+    main.bulk_import_worker(str(path))
+    messages = []
+    while not main.results.empty():
+        callback, value = main.results.get_nowait()
+        if callback is main.finish_bulk_import:
+            messages.append(value)
+    assert messages == ["Import failed: batch engine bug"]
+
+
+def test_failing_callback_does_not_stop_the_result_pump(fake_ui, monkeypatch):
+    class FakeRoot:
+        def __init__(self):
+            self.scheduled = []
+
+        def after(self, delay, function):
+            self.scheduled.append(function)
+
+    root = FakeRoot()
+    monkeypatch.setattr(main, 'root', root, raising=False)
+    delivered = []
+
+    def broken(value):
+        raise RuntimeError("callback bug")
+
+    main.results.put((broken, 1))
+    main.results.put((delivered.append, 2))
+    main.poll_results()
+    assert delivered == [2]
+    assert root.scheduled == [main.poll_results]
@@ -0,0 +1,80 @@
+import random
+import threading
+
+import pytest
+
+from loan_core import process_loan_application
+from portfolio_stats import PortfolioStats, QuantileSketch, load_portfolio_stats
+from record_writer import close_record_writers, get_record_writer
+
+
+def submit_random(count, seed):
+    rng = random.Random(seed)
+    for _ in range(count):
+        process_loan_application(rng.choice(['Housing Loan', 'Auto Loan', 'Personal Loan', 'boat']),
+                                 round(rng.uniform(200, 12000), 2), round(rng.uniform(500, 300000), 2),
+                                 rng.randint(1, 27))
+
+
+def test_snapshot_plus_replay_matches_full_replay(workdir):
+    live = load_portfolio_stats()
+    submit_random(300, seed=1)
+    get_record_writer().flush()
+    live.checkpoint()
+    submit_random(200, seed=2)
+    close_record_writers()
+
+    full = PortfolioStats()
+    full.replay()
+    resumed = PortfolioStats.from_snapshot()
+    assert resumed.replay() > 0
+    assert resumed.offset == full.offset == live.offset
+    assert resumed.summary() == full.summary() == live.summary()
+    assert full.total == 500
+    assert full.debt_ratios.count
+
+
+def test_stale_snapshot_falls_back_to_full_replay(workdir):
+    load_portfolio_stats().checkpoint()
+    submit_random(50, seed=3)
+    close_record_writers()
+    stats = load_portfolio_stats()
+    assert stats.total == 50
+    with open('loan_records.csv', 'w') as file:
+        file.write('')
+    close_record_writers()
+    assert load_portfolio_stats().total == 0
+
+
+def test_quantile_sketch_is_within_accuracy():
+    rng = random.Random(0)
+    values = sorted(rng.lognormvariate(6, 1) for _ in range(10000))
+    sketch = QuantileSketch(accuracy=0.01)
+    for value in values:
+        sketch.add(value)
+    for q in (0.5, 0.9, 0.99):
+        exact = values[int(q * (len(values) - 1))]
+        assert sketch.quantile(q) == pytest.approx(exact, rel=0.02)
+    restored = QuantileSketch.from_dict(sketch.to_dict())
+    assert restored.quantile(0.9) == sketch.quantile(0.9)
+
+
+def test_rows_written_while_loading_are_counted_once(workdir):
+    writer = get_record_writer(max_rows=1)
+    done = threading.Event()
+
+    def keep_writing():
+        for i in range(1500):
+            writer.write({'loan_type': 'auto', 'loan_amount': 1000.0 + i, 'interest_rate': 7.5,
+                          'term': 3, 'monthly_payment': 31.11, 'total_interest': 119.96,
+                          'status': 'approved', 'monthly_income': 2500.0})
+        done.set()
+
+    thread = threading.Thread(target=keep_writing)
+    thread.start()
+    loaded = []
+    while not done.is_set():
+        loaded.append(load_portfolio_stats())
+    thread.join()
+    close_record_writers()
+    assert all(stats.total == 1500 for stats in loaded)
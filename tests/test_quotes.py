@@ -0,0 +1,67 @@
+import random
+
+import pytest
+
+from loan_core import decide_loan_application, loan_types
+from quotes import max_affordable_amount, quote_grid, quote_payment, shortest_passing_term
+
+
+def approved(loan_type, monthly_income, loan_amount, term):
+    return decide_loan_application(loan_type, monthly_income, loan_amount, term)[0]
+
+
+@pytest.mark.parametrize('seed', range(3))
+def test_max_affordable_amount_is_the_approval_boundary(seed):
+    rng = random.Random(seed)
+    for _ in range(200):
+        lt = rng.choice(loan_types)
+        income = round(rng.uniform(200, 15000), 2)
+        term = rng.randint(1, lt['max_term'])
+        amount = max_affordable_amount(lt['loan_type'], income, term)
+        assert approved(lt['loan_type'], income, amount, term)
+        assert not approved(lt['loan_type'], income, round(amount + 0.01, 2), term)
+
+
+@pytest.mark.parametrize('seed', range(3))
+def test_shortest_passing_term_matches_decisions(seed):
+    rng = random.Random(seed)
+    for _ in range(200):
+        lt = rng.choice(loan_types)
+        income, amount = round(rng.uniform(200, 15000), 2), round(rng.uniform(500, 400000), 2)
+        passing = [t for t in range(1, lt['max_term'] + 1) if approved(lt['loan_type'], income, amount, t)]
+        assert shortest_passing_term(lt['loan_type'], income, amount) == (passing[0] if passing else None)
+
+
+def test_quote_grid_matches_decisions():
+    amounts = [1000.0, 25000.0, 99999.99, 250000.0]
+    grid = quote_grid('Auto Loan', 2500.0, amounts)
+    assert grid['terms'].tolist() == list(range(1, 7))
+    for i, amount in enumerate(amounts):
+        for j, term in enumerate(grid['terms'].tolist()):
+            assert grid['payments'][i, j] == quote_payment('auto', amount, term)
+            assert grid['approved'][i, j] == approved('auto', 2500.0, amount, term)
+
+
+def test_quote_payment_outside_allowed_terms():
+    assert quote_payment('housing', 50000, 0) is None
+    assert quote_payment('housing', 50000, 26) is None
+    with pytest.raises(ValueError):
+        quote_payment('boat', 50000, 5)
+
+
+@pytest.mark.parametrize('income', [0, -1000.0, float('nan'), float('inf')])
+@pytest.mark.parametrize('call', [
+    lambda income: max_affordable_amount('housing', income, 10),
+    lambda income: shortest_passing_term('housing', income, 50000),
+    lambda income: quote_grid('housing', income, [50000]),
+])
+def test_non_positive_income_is_rejected(call, income):
+    with pytest.raises(ValueError, match="Monthly income"):
+        call(income)
+
+
+def test_term_out_of_range_is_rejected():
+    with pytest.raises(ValueError):
+        max_affordable_amount('auto', 3000, 7)
+    with pytest.raises(ValueError):
+        quote_grid('auto', 3000, [1000], terms=[0, 3])
@@ -0,0 +1,127 @@
+import csv
+import os
+import threading
+import time
+
+import pytest
+
+import record_writer
+from record_writer import FIELD_NAMES, SYNC_BATCH, RecordWriter
+
+ROW = {'loan_type': 'auto', 'loan_amount': 1000.0, 'interest_rate': 7.5, 'term': 3,
+       'monthly_payment': 31.11, 'total_interest': 119.96, 'status': 'approved'}
+
+
+def read_rows(path):
+    with open(path, newline='') as file:
+        return list(csv.reader(file))
+
+
+def test_concurrent_writes_are_all_written(workdir):
+    with RecordWriter('records.csv', max_rows=7) as writer:
+        threads = [threading.Thread(target=lambda: [writer.write(ROW) for _ in range(250)])
+                   for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    rows = read_rows('records.csv')
+    assert rows[0] == FIELD_NAMES
+    assert len(rows) == 1001
+
+
+def test_failed_flush_is_retried_without_duplicates(workdir, monkeypatch):
+    writer = RecordWriter('records.csv', durability=SYNC_BATCH)
+    real_fsync = os.fsync
+    calls = []
+
+    def failing_fsync(fd):
+        calls.append(fd)
+        if len(calls) == 1:
+            raise OSError(28, "No space left on device")
+        real_fsync(fd)
+
+    monkeypatch.setattr(record_writer.os, 'fsync', failing_fsync)
+    writer.write_rows([ROW, ROW])
+    with pytest.raises(OSError):
+        writer.flush()
+    writer.flush()
+    writer.close()
+    assert len(read_rows('records.csv')) == 3
+
+
+def test_timer_survives_flush_errors(workdir):
+    writer = RecordWriter('records.csv', max_delay=0.05)
+    real_flush = writer._flush_locked
+    failures = []
+
+    def flaky_flush():
+        if not failures:
+            failures.append(1)
+            raise OSError("disk went away")
+        real_flush()
+
+    writer._flush_locked = flaky_flush
+    writer.write(ROW)
+    deadline = time.monotonic() + 2
+    while len(read_rows('records.csv')) < 2 and time.monotonic() < deadline:
+        time.sleep(0.02)
+    assert failures and writer._timer.is_alive()
+    assert len(read_rows('records.csv')) == 2
+    writer.close()
+
+
+def test_failing_listener_does_not_break_writes(workdir, caplog):
+    seen = []
+
+    def broken(rows, offset):
+        raise RuntimeError("listener bug")
+
+    with RecordWriter('records.csv', max_rows=2) as writer:
+        writer.add_listener(broken)
+        writer.add_listener(lambda rows, offset: seen.append((len(rows), offset)))
+        writer.write_rows([ROW, ROW])
+        writer.write(ROW)
+    assert len(read_rows('records.csv')) == 4
+    assert [count for count, _ in seen] == [2, 1]
+    assert seen[-1][1] == os.path.getsize('records.csv')
+    assert "listener bug" in caplog.text
+
+
+def test_appending_keeps_an_older_files_layout(workdir):
+    legacy = FIELD_NAMES[:7]
+    with open('records.csv', 'w', newline='') as file:
+        csv.writer(file).writerow(legacy)
+    with RecordWriter('records.csv') as writer:
+        writer.write(dict(ROW, monthly_income=4000.0))
+    with open('records.csv', newline='') as file:
+        rows = list(csv.DictReader(file))
+    assert rows == [{name: str(ROW[name]) for name in legacy}]
+
+
+def test_rows_from_a_failed_write_are_not_kept(workdir):
+    writer = RecordWriter('records.csv', max_rows=3)
+    writer.write(ROW)
+    real_write = writer._write_text
+
+    def failing_write():
+        raise OSError(28, "No space left on device")
+
+    writer._write_text = failing_write
+    with pytest.raises(OSError):
+        writer.write_rows([ROW, ROW])
+    writer._write_text = real_write
+    writer.close()
+    assert len(read_rows('records.csv')) == 2
+
+
+def test_shared_writers_follow_the_working_directory(workdir, monkeypatch):
+    first = record_writer.get_record_writer('records.csv')
+    (workdir / 'other').mkdir()
+    monkeypatch.chdir(workdir / 'other')
+    second = record_writer.get_record_writer('records.csv')
+    assert second is not first
+    second.write(ROW)
+    record_writer.close_record_writers()
+    assert len(read_rows(workdir / 'other' / 'records.csv')) == 2
+    assert len(read_rows(workdir / 'records.csv')) == 1
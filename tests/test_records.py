@@ -0,0 +1,111 @@
+import csv
+import os
+
+import numpy as np
+import pytest
+
+from record_writer import FIELD_NAMES, RecordWriter
+from records import LoanRecords, migrate_records_file, repair_row
+
+HEADER = "loan_type,loan_amount,interest_rate,term,monthly_payment,total_interest,status\n"
+APPROVED = "auto,1000.0,7.5,3,31.11,119.96,approved\n"
+DENIED = "housing,900000.0,5.2,10,9631.85,255822.0,denied\n"
+
+
+def write(path, text, mode='w'):
+    with open(path, mode) as file:
+        file.write(text)
+
+
+def test_legacy_rows_are_repaired_and_bad_rows_quarantined(workdir):
+    write('records.csv', HEADER + APPROVED
+          + "auto,1000.0,7.5,2000,3,31.11,119.96,0.02,approved\n"
+          + "personal,5000.0,9.6,100,2,229.61,2.3,rejected,too high\n"
+          + "auto,oops\n")
+    records = LoanRecords('records.csv')
+    assert len(records) == 3
+    assert records.repaired == 2
+    assert records.count(status='denied') == 1
+    assert [q[0] for q in records.quarantine] == [5]
+
+
+def test_refresh_reads_only_complete_appended_lines(workdir):
+    write('records.csv', HEADER + APPROVED)
+    records = LoanRecords('records.csv')
+    write('records.csv', DENIED + "auto,10", 'a')
+    assert records.refresh() == 1
+    write('records.csv', "00.0,7.5,3,31.11,119.96,approved\n", 'a')
+    assert records.refresh() == 1
+    assert records.count(loan_type='auto') == 2
+    assert records.select(status='approved').tolist() == [0, 2]
+
+
+def test_refresh_reloads_a_truncated_file(workdir):
+    write('records.csv', HEADER + APPROVED * 3)
+    records = LoanRecords('records.csv')
+    write('records.csv', HEADER + DENIED)
+    assert records.refresh() == 1
+    assert len(records) == 1
+    assert records.count(status='approved') == 0
+    assert records.loan_types == ['housing']
+
+
+def test_refresh_reloads_a_replaced_file(workdir):
+    write('records.csv', HEADER + APPROVED)
+    records = LoanRecords('records.csv')
+    write('replacement.csv', HEADER + DENIED * 2)
+    os.replace('replacement.csv', 'records.csv')
+    assert records.refresh() == 2
+    assert records.count() == 2
+    assert records.count(status='approved') == 0
+
+
+@pytest.mark.parametrize('call', [
+    lambda r: r.select(status='rejected'),
+    lambda r: r.count(status='Approved'),
+    lambda r: r.mean_payment(status='pending'),
+])
+def test_unknown_status_filter_is_a_clear_error(workdir, call):
+    write('records.csv', HEADER + APPROVED)
+    with pytest.raises(ValueError, match="unknown status"):
+        call(LoanRecords('records.csv'))
+
+
+def test_repair_row_rejects_unknown_layouts():
+    with pytest.raises(ValueError):
+        repair_row(['auto', '1', '2'])
+
+
+def test_monthly_income_column(workdir):
+    write('records.csv', HEADER + APPROVED
+          + "auto,1000.0,7.5,3,31.11,119.96,approved,2500.0\n"
+          + "auto,1000.0,7.5,2000,3,31.11,119.96,0.02,approved\n")
+    incomes = LoanRecords('records.csv').columns['monthly_income']
+    assert np.isnan(incomes[0])
+    assert incomes[1:].tolist() == [2500.0, 2000.0]
+
+
+def test_migrate_records_file_adds_the_income_column(workdir):
+    write('records.csv', HEADER + APPROVED
+          + "auto,1000.0,7.5,2000,3,31.11,119.96,0.02,approved\n" + "auto,oops\n")
+    assert migrate_records_file('records.csv') == 2
+    with RecordWriter('records.csv') as writer:
+        writer.write({'loan_type': 'auto', 'loan_amount': 1000.0, 'interest_rate': 7.5, 'term': 3,
+                      'monthly_payment': 31.11, 'total_interest': 119.96, 'status': 'approved',
+                      'monthly_income': 4000.0})
+    with open('records.csv', newline='') as file:
+        rows = list(csv.reader(file))
+    assert rows[0] == FIELD_NAMES
+    assert [row[-1] for row in rows[1:3]] == ['', '2000.0']
+    assert rows[3] == ['auto', 'oops']
+    assert rows[4][-1] == '4000.0'
+    records = LoanRecords('records.csv')
+    assert len(records) == 3 and records.repaired == 0 and len(records.quarantine) == 1
+
+
+def test_select_results_do_not_share_the_index(workdir):
+    write('records.csv', HEADER + APPROVED + DENIED + APPROVED)
+    records = LoanRecords('records.csv')
+    selected = records.select(status='approved')
+    selected[0] = 999
+    assert records.select(status='approved').tolist() == [0, 2]
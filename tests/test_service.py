@@ -0,0 +1,131 @@
+import asyncio
+import json
+
+import pytest
+
+from idempotency import application_cache, process_loan_application_once
+from service import LoanService, RequestError, parse_application
+
+GOOD = {"loan_type": "housing", "monthly_income": 3000, "loan_amount": 50000, "term": 10}
+
+
+def post(service, body):
+    return asyncio.run(service.handle_request('POST', '/applications', body))
+
+
+@pytest.fixture
+def service(workdir):
+    service = LoanService()
+    yield service
+    service.close()
+
+
+@pytest.mark.parametrize('field, value', [
+    ('monthly_income', float('nan')), ('monthly_income', float('inf')),
+    ('loan_amount', float('-inf')), ('term', float('nan')), ('term', 10 ** 400),
+    ('monthly_income', 0), ('term', 2.5), ('loan_amount', True),
+])
+def test_parse_application_rejects_bad_numbers(field, value):
+    with pytest.raises(RequestError) as error:
+        parse_application(dict(GOOD, **{field: value}))
+    assert error.value.status == 400
+
+
+@pytest.mark.parametrize('body', [
+    b'{"loan_type":"housing","monthly_income":NaN,"loan_amount":900000,"term":10}',
+    b'{"loan_type":"housing","monthly_income":Infinity,"loan_amount":900000,"term":10}',
+    b'{"loan_type":"housing","monthly_income":3000,"loan_amount":1e400,"term":10}',
+    b'[' * 100000 + b']' * 100000,
+    b'not json',
+])
+def test_bad_bodies_are_400(service, body):
+    with pytest.raises(RequestError) as error:
+        post(service, body)
+    assert error.value.status == 400
+
+
+def test_single_and_batched_applications(service):
+    status, payload = post(service, json.dumps(GOOD).encode())
+    assert status == 200 and payload['approved'] is True
+    status, payload = post(service, json.dumps([GOOD, dict(GOOD, loan_type="boat")]).encode())
+    assert [p['approved'] for p in payload] == [True, False]
+    assert payload[1]['message'] == "Invalid loan type."
+
+
+async def raw_request(service, request):
+    server = await asyncio.start_server(service.handle_connection, '127.0.0.1', 0)
+    port = server.sockets[0].getsockname()[1]
+    async with server:
+        reader, writer = await asyncio.open_connection('127.0.0.1', port)
+        writer.write(request)
+        await writer.drain()
+        response = await reader.read()
+        writer.close()
+    return response
+
+
+def test_bad_content_length_gets_a_400_response(service):
+    response = asyncio.run(raw_request(
+        service, b"POST /applications HTTP/1.1\r\nContent-Length: abc\r\n\r\n{}"))
+    assert response.startswith(b"HTTP/1.1 400 ")
+    assert b"Connection: close" in response
+
+
+def test_idempotency_key_reused_for_another_application_is_422(service):
+    first = dict(GOOD, idempotency_key='abc')
+    assert post(service, json.dumps(first).encode())[0] == 200
+    assert post(service, json.dumps(first).encode())[1]['approved'] is True
+    with pytest.raises(RequestError) as error:
+        post(service, json.dumps(dict(first, loan_amount=900000)).encode())
+    assert error.value.status == 422
+    status, payload = post(service, json.dumps([first, dict(first, term=5)]).encode())
+    assert status == 200 and payload[0]['approved'] is True and 'error' in payload[1]
+    assert service.decisions == 1
+
+
+def test_service_cache_is_separate_from_the_app_cache(service):
+    application_cache.clear()
+    process_loan_application_once('housing', 3000, 50000, 10)
+    assert post(service, json.dumps(GOOD).encode())[1]['approved'] is True
+    assert process_loan_application_once('housing', 3000, 50000, 10)[0] is True
+    assert service.cache.stats()['misses'] == 1
+
+
+def test_failed_write_is_not_cached(service, monkeypatch):
+    real_write_rows, calls = service.records.write_rows, []
+
+    def failing_write_rows(rows):
+        calls.append(rows)
+        if len(calls) == 1:
+            raise OSError(28, "No space left on device")
+        real_write_rows(rows)
+
+    monkeypatch.setattr(service.records, 'write_rows', failing_write_rows)
+    body = json.dumps(dict(GOOD, idempotency_key='retry-me')).encode()
+    with pytest.raises(OSError):
+        post(service, body)
+    assert service.decisions == 0
+    assert post(service, body)[1]['approved'] is True
+    assert service.decisions == 1
+    assert [len(rows) for rows in calls] == [1, 1]
+    assert service.cache.stats()['hits'] == 0
+
+
+def test_unexpected_errors_get_a_500_response(service, monkeypatch):
+    def broken(rows):
+        raise OSError(28, "No space left on device")
+
+    monkeypatch.setattr(service.records, 'write_rows', broken)
+    body = json.dumps(GOOD).encode()
+    response = asyncio.run(raw_request(
+        service, b"POST /applications HTTP/1.1\r\nContent-Length: %d\r\n\r\n%s" % (len(body), body)))
+    assert response.startswith(b"HTTP/1.1 500 Internal Server Error\r\n")
+    assert b"Connection: close" in response
+
+
+def test_close_detaches_the_stats_listener(workdir):
+    service = LoanService()
+    service.close()
+    post(service, json.dumps(GOOD).encode())
+    service.records.flush()
+    assert service.stats.total == 0
@@ -0,0 +1,64 @@
+import numpy as np
+import pytest
+
+from loan_core import process_loan_application
+from record_writer import close_record_writers
+from stress import generate_scenarios, load_stress_portfolio, run_shard, stress_test, summarize
+
+HEADER = "loan_type,loan_amount,interest_rate,term,monthly_payment,total_interest,status\n"
+
+
+def test_empty_book(workdir):
+    process_loan_application('boat', 3000, 50000, 10)
+    close_record_writers()
+    portfolio = load_stress_portfolio()
+    assert len(portfolio['amount']) == 0
+    metrics = stress_test(portfolio, *generate_scenarios(10), workers=1)
+    summary = summarize(metrics, portfolio)
+    assert summary['loans'] == 0 and summary['worst_newly_failing'] is None
+    assert summary['max_payment_increase']['p99'] == 0
+
+
+def test_portfolio_uses_recorded_incomes(workdir):
+    process_loan_application('Housing Loan', 2000, 150000, 25)   # payment 894.45, ratio 0.45
+    process_loan_application('Auto Loan', 9000, 20000, 5)        # ratio under 0.05
+    close_record_writers()
+    portfolio = load_stress_portfolio()
+    assert portfolio['income'].tolist() == [2000.0, 9000.0]
+    metrics = run_shard(portfolio, np.array([[2.0, 2.0, 2.0], [0.0, 0.0, 0.0]]), np.array([1.0, 0.8]))
+    assert metrics['newly_failing'].tolist() == [1, 1]
+    assert (metrics['max_increase'] > 0).tolist() == [True, False]
+
+
+def test_newly_failing_needs_incomes(workdir):
+    with open('loan_records.csv', 'w') as file:
+        file.write(HEADER + "auto,20000.0,7.5,5,400.76,4045.6,approved\n")
+    portfolio = load_stress_portfolio()
+    assert np.isnan(portfolio['income']).all()
+    metrics = stress_test(portfolio, *generate_scenarios(50, seed=1), workers=1)
+    assert not metrics['newly_failing'].any()
+    summary = summarize(metrics, portfolio)
+    assert summary['loans'] == 1 and summary['loans_with_income'] == 0
+    assert summary['newly_failing_pct'] is None
+    assert summary['max_payment_increase']['p99'] > 0
+
+
+def test_process_pool_matches_single_worker(workdir):
+    rng = np.random.default_rng(0)
+    for income, amount in zip(rng.uniform(1500, 6000, 40).round(2), rng.uniform(5000, 90000, 40).round(2)):
+        process_loan_application('Personal Loan', float(income), float(amount), 10)
+    close_record_writers()
+    portfolio = load_stress_portfolio()
+    scenarios = generate_scenarios(40, seed=2)
+    single = stress_test(portfolio, *scenarios, workers=1, chunk_size=7)
+    pooled = stress_test(portfolio, *scenarios, workers=2)
+    for name in single:
+        np.testing.assert_allclose(pooled[name], single[name])
+    assert summarize(single, portfolio)['loans'] == len(portfolio['amount']) > 0
+
+
+def test_zero_scenarios_are_rejected(workdir):
+    with pytest.raises(ValueError):
+        generate_scenarios(0)
+    with pytest.raises(ValueError):
+        stress_test(load_stress_portfolio(), np.empty((0, 3)), np.empty(0), workers=1)